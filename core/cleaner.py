@@ -19,6 +19,7 @@ from .storage import RedisProxyClient
 from .validator import ProxyValidator
 from ..utils.config import ProxyConfig
 from .fetcher import ProxyFetcher
+from ..models.proxy_model import ProxyModel
 
 
 class ProxyCleaner:
@@ -26,13 +27,24 @@ class ProxyCleaner:
             self,
             config: ProxyConfig = ProxyConfig(),
             storage: Optional[RedisProxyClient] = None,
-            validator: Optional[ProxyValidator] = None
+            validator: Optional[ProxyValidator] = None,
+            fetcher: Optional[ProxyFetcher] = None
     ):
         self.config = config
         self.logger = setup_logger()
         self.storage = storage or RedisProxyClient(config)
+        # 外部传入的验证器 / 获取器由调用方关闭, 自建的在 close() 中关闭
+        self._owns_validator = validator is None
+        self._owns_fetcher = fetcher is None
         self.validator = validator or ProxyValidator(config)
-        self.fetcher = ProxyFetcher()
+        self.fetcher = fetcher or ProxyFetcher()
+
+    async def close(self):
+        """ 关闭自建的验证器与获取器 """
+        if self._owns_fetcher:
+            await self.fetcher.close()
+        if self._owns_validator:
+            await self.validator.close()
 
     async def clean_invalid_proxies(self) -> int:
         """
@@ -42,21 +54,27 @@ class ProxyCleaner:
             清理的代理数量
         """
         try:
+            # 评分已低于有效分数的代理直接在服务端移除, 无需再验证
+            swept = await self.storage.remove_below_score(self.config.VALID_SCORE)
+
             # 获取所有代理, 加上 await 处理异步方法
             all_proxies_str = await self.storage.get_all_proxies()
 
             # 代理有效性验证, 有效代理获取
             valid_proxies = await self.validator.validate_proxy(all_proxies_str)
 
+            # 验证后统计已更新, 按最新评分回写, 排序与清理不再依赖入库时的旧评分
+            await self.storage.add_many([p for p in valid_proxies if isinstance(p, ProxyModel)])
+
             # 无效代理差集获取
-            invalid_proxies = [proxy for proxy in all_proxies_str if proxy not in valid_proxies]
+            valid_set = set(valid_proxies)
+            invalid_proxies = [proxy for proxy in all_proxies_str if proxy not in valid_set]
 
             # 批量移除无效代理
-            for proxy in invalid_proxies:
-                await self.storage.remove(proxy)
+            removed = swept + await self.storage.remove_many(invalid_proxies)
 
-            self.logger.info(f"清理无效代理 {len(invalid_proxies)} 个")
-            return len(invalid_proxies)
+            self.logger.info(f"清理无效代理 {removed} 个")
+            return removed
 
         except Exception as e:
             self.logger.error(f"代理清理异常: {e}")
@@ -15,6 +15,7 @@ import asyncio
 import aiohttp
 import re
 import sys
+from contextlib import asynccontextmanager
 from lxml import etree
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
@@ -29,6 +30,17 @@ from proxy_pool.utils.logger import setup_logger
 from proxy_pool.utils.web_request import WebRequest
 
 
+# ip:port 格式, 八位组不允许前导零 (与 ProxyModel 的地址校验一致)
+_PROXY_PATTERN = re.compile(
+    r"^((0|[1-9]\d{0,2})\.(0|[1-9]\d{0,2})\.(0|[1-9]\d{0,2})\.(0|[1-9]\d{0,2})):(\d{1,5})$"
+)
+
+# 表格解析的预编译 xpath, 逐行调用时不再重复编译表达式
+_XP_TABLE_ROWS = etree.XPath("//table//tr")
+_XP_TD1_TEXT = etree.XPath("./td[1]/text()")
+_XP_TD2_TEXT = etree.XPath("./td[2]/text()")
+
+
 @dataclass
 class ProxySource:
     """ 代理源配置数据 """
@@ -137,17 +149,21 @@ class ProxySourceBase(ABC):
 class ProxyFetcher:
     """ 代理获取器 """
 
-    def __init__(self, config: ProxyConfig = ProxyConfig()):
+    def __init__(
+            self,
+            config: ProxyConfig = ProxyConfig(),
+            session: Optional[aiohttp.ClientSession] = None
+    ):
         self.web_request = WebRequest()
         self.config = config
         self.logger = setup_logger("fetcher")
-        self.validator = ProxyValidator()
+        self._session = session  # 外部共享会话, 由调用方负责关闭
+        self.validator = ProxyValidator(session=session)
 
         # 代理源注册
         self.sources = {}
         self._register_sources()
 
-        self._proxy_cache: Set[str] = set()
         self.stats = {
             "total_fetch": 0,
             "valid_count": 0,
@@ -197,34 +213,26 @@ class ProxyFetcher:
             if not proxy_str:
                 return None
 
-            match = re.match(
-                r"^(?P<ip>\d{1,3}(\.\d{1,3}){3}):(?P<port>\d+)$",
-                proxy_str.strip()
-            )
+            match = _PROXY_PATTERN.match(proxy_str.strip())
             if not match:
                 return None
 
-            ip = match.group("ip")
-            port = int(match.group("port"))
+            ip, *octets, port = match.groups()
+            port = int(port)
 
-            # 基本验证
-            if not self._validate_ip_port(ip, port):
+            # 基本验证, 直接使用正则分组, 无需再次拆分地址
+            if not (all(int(octet) <= 255 for octet in octets) and 1 <= port <= 65535):
                 return None
 
-            # 创建代理模型
+            # 创建代理模型, 地址与端口已验证过
             proxy = ProxyModel(
                 ip=ip,
                 port=port,
                 protocol="http",
                 source=self._get_source_name(proxy_str),
+                skip_validation=True,
             )
 
-            # 去重检查
-            proxy_key = f"{ip}:{port}"
-            if proxy_key in self._proxy_cache:
-                return None
-            self._proxy_cache.add(proxy_key)
-
             return proxy
 
         except Exception as e:
@@ -308,6 +316,15 @@ class ProxyFetcher:
             for name, config in source_configs.items()
         }
 
+    @asynccontextmanager
+    async def _source_session(self):
+        """ 优先使用外部共享会话, 否则为本次抓取创建临时会话 """
+        if self._session is not None and not self._session.closed:
+            yield self._session
+        else:
+            async with aiohttp.ClientSession() as session:
+                yield session
+
     async def fetch_from_source(self, source: ProxySourceBase, session: aiohttp.ClientSession) -> List[ProxyModel]:
         """ 从单个代理获取代理 """
         proxies = []
@@ -339,13 +356,14 @@ class ProxyFetcher:
     async def _verify_proxy(self, proxy: ProxyModel) -> bool:
         """ 验证单个代理 """
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                        'http://www.baidu.com',
-                        proxy=f"http://{proxy.ip}:{proxy.port}",
-                        timeout=5
-                ) as response:
-                    return response.status == 200
+            # 复用验证器的共享会话, 避免每个代理新建连接池
+            session = await self.validator.get_session()
+            async with session.get(
+                    'http://www.baidu.com',
+                    proxy=f"http://{proxy.ip}:{proxy.port}",
+                    timeout=5
+            ) as response:
+                return response.status == 200
         except Exception:
             return False
 
@@ -373,6 +391,51 @@ class ProxyFetcher:
         """ 关闭资源 """
         if hasattr(self, 'web_request') and self.web_request:
             await self.web_request.close()
+        await self.validator.close()
+
+    async def fetch_to_queue(self, queue: asyncio.Queue) -> int:
+        """
+        各代理源抓取完成即将代理放入队列, 下游验证无需等待全部代理源
+
+        Args:
+            queue: 代理输出队列
+
+        Returns:
+            入队的代理数量
+        """
+        all_proxies = []
+        valid_proxies = []
+        seen: Set[ProxyModel] = set()
+        try:
+            async with self._source_session() as session:
+                tasks = [
+                    asyncio.create_task(self.fetch_from_source(source, session))
+                    for source in self.sources.values()
+                    if source.config.enabled
+                ]
+                try:
+                    for task in asyncio.as_completed(tasks):
+                        # 本轮内跨代理源去重, 不跨轮次保留, 已见过的代理下一轮仍会重新验证
+                        proxies = [proxy for proxy in dict.fromkeys(await task) if proxy not in seen]
+                        seen.update(proxies)
+                        all_proxies.extend(proxies)
+
+                        if self.config.verify_proxy:
+                            proxies = await self._verify_proxies(proxies)
+                        valid_proxies.extend(proxies)
+
+                        for proxy in proxies:
+                            await queue.put(proxy)
+                finally:
+                    # 被取消或出错时结束未完成的抓取任务, 须在会话关闭前完成
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+        except Exception as e:
+            self.logger.error(f"代理获取异常: {str(e)}")
+
+        self._update_stats(all_proxies, valid_proxies)
+        return len(valid_proxies)
 
     async def fetch_all(self) -> List[ProxyModel]:
         """ 获取所有代理源的代理 """
@@ -381,7 +444,7 @@ class ProxyFetcher:
             if not hasattr(self, 'web_request') or self.web_request is None:
                 self.web_request = WebRequest()
 
-            async with aiohttp.ClientSession() as session:
+            async with self._source_session() as session:
                 tasks = []
                 # 仅使用启用的代理源
                 for source in self.sources.values():
@@ -398,6 +461,12 @@ class ProxyFetcher:
                     if isinstance(result, list):
                         all_proxies.extend(result)
 
+                # 多个代理源常有重叠, 按 (ip, port, protocol) 去重并保持顺序, 避免重复验证
+                fetched_count = len(all_proxies)
+                all_proxies = list(dict.fromkeys(all_proxies))
+                if fetched_count > len(all_proxies):
+                    self.logger.info(f"去除重复代理 {fetched_count - len(all_proxies)} 个")
+
                 if self.config.verify_proxy:
                     valid_proxies = await self._verify_proxies(all_proxies)
                 else:
@@ -515,10 +584,10 @@ class ZdayeProxySource(ProxySourceBase):
                                 detail_html = etree.HTML(detail_text)
 
                                 # 提取代理信息
-                                for tr in detail_html.xpath("//table//tr"):
+                                for tr in _XP_TABLE_ROWS(detail_html):
                                     try:
-                                        ip = "".join(tr.xpath("./td[1]/text()")).strip()
-                                        port = "".join(tr.xpath("./td[2]/text()")).strip()
+                                        ip = "".join(_XP_TD1_TEXT(tr)).strip()
+                                        port = "".join(_XP_TD2_TEXT(tr)).strip()
                                         if ip and port:
                                             yield f"{ip}:{port}"
                                     except Exception as e:
@@ -579,8 +648,8 @@ class Ip66ProxySource(ProxySourceBase):
                     proxy_list = html.xpath('//div[@id="main"]//table//tr[position()>1]')
                     for proxy in proxy_list:
                         try:
-                            ip = proxy.xpath('./td[1]/text()')[0]
-                            port = proxy.xpath('./td[2]/text()')[0]
+                            ip = _XP_TD1_TEXT(proxy)[0]
+                            port = _XP_TD2_TEXT(proxy)[0]
                             proxy_str = f"{ip}:{port}"
                             yield proxy_str
                         except (IndexError, Exception) as e:
@@ -620,13 +689,13 @@ class KuaidailiProxySource(ProxySourceBase):
                         self.logger.error("快代理页面解析失败")
                         continue
 
-                    rows = html.xpath('//table//tr')
+                    rows = _XP_TABLE_ROWS(html)
                     self.logger.info(f"找到 {len(rows)} 个代理")
 
                     for row in rows:
                         try:
-                            ip = row.xpath("./td[1]/text()")[0].strip()
-                            port = row.xpath("./td[2]/text()")[0].strip()
+                            ip = _XP_TD1_TEXT(row)[0].strip()
+                            port = _XP_TD2_TEXT(row)[0].strip()
                             if ip and port:
                                 proxy =  f"{ip}:{port}"
                                 self.logger.debug(f"获取到代理: {proxy}")
@@ -671,13 +740,13 @@ class Ip3366ProxySource(ProxySourceBase):
                         self.logger.error("快代理页面解析失败")
                         continue
 
-                    rows = html.xpath('//table//tr')
+                    rows = _XP_TABLE_ROWS(html)
                     self.logger.info(f"找到 {len(rows)} 个代理")
 
                     for row in rows:
                         try:
-                            ip = row.xpath("./td[1]/text()")[0].strip()
-                            port = row.xpath("./td[2]/text()")[0].strip()
+                            ip = _XP_TD1_TEXT(row)[0].strip()
+                            port = _XP_TD2_TEXT(row)[0].strip()
                             if ip and port:
                                 proxy = f"{ip}:{port}"
                                 self.logger.debug(f"获取到代理: {proxy}")
@@ -13,9 +13,9 @@ Changed history:            重构 Redis 存储逻辑,增强代理存储管理
 
 # import aioredis  # 3.11 兼容 bug
 import redis
-# import asyncio  # 结合 redis 实现同 aioredis 的异步功能
+import asyncio  # 结合 redis 实现同 aioredis 的异步功能
 import random
-import json
+import time
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
@@ -24,7 +24,7 @@ from typing import Optional, Union, List, Dict, Any
 from proxy_pool.utils.config import ProxyConfig, Settings
 # from proxy_pool.utils.exceptions import ProxyPoolError
 from proxy_pool.utils.logger import setup_logger
-from proxy_pool.models.proxy_model import ProxyModel
+from proxy_pool.models.proxy_model import ProxyModel, msgpack
 
 
 settings = Settings()
@@ -32,6 +32,107 @@ settings = Settings()
 logger = setup_logger()
 
 
+# 按评分随机抽取代理: 只在排名上做稀疏 Fisher-Yates 抽样, 按排名 O(log N) 取成员,
+# 不再把整个评分区间载入脚本内存, 种子由调用方传入, 返回代理地址列表
+_RANDOM_PROXIES_SCRIPT = """
+local base = redis.call('ZCOUNT', KEYS[1], '-inf', '(' .. ARGV[1])
+local n = redis.call('ZCARD', KEYS[1]) - base
+if n <= 0 then
+    return {}
+end
+local count = math.min(tonumber(ARGV[2]), n)
+math.randomseed(tonumber(ARGV[3]))
+local swapped = {}
+local picked = {}
+for i = 1, count do
+    local j = math.random(i, n)
+    local rank = swapped[j] or j
+    swapped[j] = swapped[i] or i
+    picked[i] = redis.call('ZRANGE', KEYS[1], base + rank - 1, base + rank - 1)[1]
+end
+return picked
+"""
+
+
+# 移除评分低于阈值的代理及其详情, 分块调用避免 unpack 参数过多, 返回移除数量
+_REMOVE_BELOW_SCORE_SCRIPT = """
+local keys = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1])
+for i = 1, #keys, 500 do
+    local chunk = {unpack(keys, i, math.min(i + 499, #keys))}
+    redis.call('ZREM', KEYS[1], unpack(chunk))
+    redis.call('HDEL', KEYS[2], unpack(chunk))
+end
+return #keys
+"""
+
+
+# 写入代理评分与详情, 返回是否新增
+# ARGV[4] == '1' (已验证的代理模型): 每次验证都以最新评分与详情覆盖
+# 否则 (仅有地址): 代理不存在时才写入, 不覆盖已有评分与详情
+_ADD_SCRIPT = """
+if ARGV[4] == '1' then
+    local added = redis.call('ZADD', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+    return added
+end
+local added = redis.call('ZADD', KEYS[1], 'NX', ARGV[1], ARGV[2])
+if added == 1 then
+    redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+end
+return added
+"""
+
+# 批量调整已有代理评分并限制在 [ARGV[1], ARGV[2]] 内, 不存在的代理跳过, 返回更新数量
+_UPDATE_SCORES_SCRIPT = """
+local min_score = tonumber(ARGV[1])
+local max_score = tonumber(ARGV[2])
+local updated = 0
+for i = 3, #ARGV, 2 do
+    local current = redis.call('ZSCORE', KEYS[1], ARGV[i])
+    if current then
+        local score = math.max(min_score, math.min(tonumber(current) + tonumber(ARGV[i + 1]), max_score))
+        redis.call('ZADD', KEYS[1], score, ARGV[i])
+        updated = updated + 1
+    end
+end
+return updated
+"""
+
+
+# 进程内共享的连接池, 按连接参数复用, API 与后台任务共用同一组连接
+_connection_pools: Dict[tuple, redis.ConnectionPool] = {}
+
+
+def _get_connection_pool(config: ProxyConfig) -> redis.ConnectionPool:
+    """
+    获取进程内共享的连接池, 不存在时创建
+
+    响应不做解码, 直接返回 bytes, 只在需要字符串的地方解码, 批量读取时省去逐条 UTF-8 解码
+
+    Args:
+        config: Redis 配置参数
+
+    Returns:
+        Redis 连接池
+    """
+    pool_key = (
+        config.REDIS_HOST,
+        config.REDIS_PORT,
+        config.REDIS_DB,
+        config.REDIS_PASSWORD,
+    )
+    if pool_key not in _connection_pools:
+        _connection_pools[pool_key] = redis.ConnectionPool(
+            host=config.REDIS_HOST,
+            port=config.REDIS_PORT,
+            db=config.REDIS_DB,
+            password=config.REDIS_PASSWORD,
+            decode_responses=False,
+            max_connections=settings.REDIS_POOL_SIZE  # 最大连接数
+        )
+    return _connection_pools[pool_key]
+
+
 class RedisConnectionPool:
     """ Redis 连接池管理 """
     def __init__(self, config: ProxyConfig):
@@ -42,13 +143,13 @@ class RedisConnectionPool:
             config: Redis 配置参数
         """
         self._config = config
-        self._pool = redis.ConnectionPool(
-            host=config.REDIS_HOST,
-            port=config.REDIS_PORT,
-            password=config.REDIS_PASSWORD,
-            decode_responses=True,
-            max_connections=50  # 最大连接数
-        )
+        self._pool = _get_connection_pool(config)
+        self._client = redis.Redis(connection_pool=self._pool)
+
+    @property
+    def client(self) -> redis.Redis:
+        """ 共享连接池上的 Redis 客户端 """
+        return self._client
 
     @contextmanager
     def get_connection(self):
@@ -58,52 +159,45 @@ class RedisConnectionPool:
         Yields:
             Redis 连接对象
         """
-        conn = None
-        try:
-            conn = redis.Redis(connection_pool=self._pool)
-            yield conn
-        finally:
-            if conn:
-                conn.close()
+        yield self._client
+
+    def close(self):
+        """ 断开连接池中的所有连接 """
+        self._pool.disconnect()
 
 
 class ProxySerializer:
     """ 代理数据序列化处理 """
     @staticmethod
-    def serialize(proxy: ProxyModel) -> str:
+    def serialize(proxy: ProxyModel) -> bytes:
         """
-        序列化代理对象为 JSON 字符串
+        序列化代理对象, 安装了 msgpack 时使用 msgpack, 否则使用 JSON
 
         Args:
             proxy: 代理模型对象
 
         Returns:
-            序列化后的 JSON 字符串
+            序列化后的 msgpack 数据或 UTF-8 JSON 数据
         """
-        return json.dumps({
-            'ip': proxy.ip,
-            'port': proxy.port,
-            'protocol': proxy.protocol,
-            'success_rate': proxy.success_rate,
-            'response_times': proxy.response_times,
-            'last_check_time': proxy.last_check_time.isoformat() if proxy.last_check_time else None,
-        })
+        if msgpack is not None:
+            return proxy.to_msgpack()
+        return proxy.to_json_bytes()
 
     @staticmethod
-    def deserialize(data: str) -> ProxyModel:
+    def deserialize(data: Union[str, bytes]) -> ProxyModel:
         """
-        反序列化 JSON 字符串为代理对象
+        反序列化代理对象, JSON 以 '{' 开头, 其余按 msgpack 处理
+        数据来自 Redis, 入库前已验证, 因此跳过参数验证
 
         Args:
-            data: JSON 字符串
+            data: JSON 字符串或 msgpack 数据
 
         Returns:
             代理模型对象
         """
-        proxy_dict = json.loads(data)
-        if proxy_dict.get('last_check_time'):
-            proxy_dict['last_check_time'] = datetime.fromisoformat(proxy_dict['last_check_time'])
-        return ProxyModel(**proxy_dict)
+        if isinstance(data, str) or data[:1] == b"{":
+            return ProxyModel.from_json(data, trusted=True)
+        return ProxyModel.from_msgpack(data, trusted=True)
 
 
 class RedisProxyClient:
@@ -130,12 +224,13 @@ class RedisProxyClient:
         self._pool = RedisConnectionPool(config)
         self._serializer = ProxySerializer()
         self.executor = ThreadPoolExecutor()
-        self.pool = redis.ConnectionPool.from_url(
-            settings.REDIS_URL,
-            decode_responses=True  # 自动解码响应
-        )
-        self.redis = redis.Redis(connection_pool=self.pool)
+        self.redis = self._pool.client  # 响应为 bytes, 代理详情可能是二进制 (msgpack)
         self.key_prefix = settings.REDIS_KEY_PREFIX
+        self._details_key = f"{config.REDIS_KEY}:details"
+        self._random_script = self.redis.register_script(_RANDOM_PROXIES_SCRIPT)
+        self._remove_below_script = self.redis.register_script(_REMOVE_BELOW_SCORE_SCRIPT)
+        self._add_script = self.redis.register_script(_ADD_SCRIPT)
+        self._update_scores_script = self.redis.register_script(_UPDATE_SCORES_SCRIPT)
 
     async def _run_sync(self, func, *args):
         """
@@ -154,8 +249,7 @@ class RedisProxyClient:
     def close(self):
         """ 关闭连接池 """
         try:
-            if self.redis:
-                self.redis.close()
+            self._pool.close()
         except Exception as e:
             self.logger.error(f"关闭 Redis 连接池失败: {e}")
 
@@ -172,42 +266,81 @@ class RedisProxyClient:
         finally:
             pipe.reset()
 
+    @property
+    def _address_score(self) -> float:
+        """ 纯地址代理的入库评分, 不低于 VALID_SCORE, 否则入库后既不会被提供也会被首轮清理移除 """
+        return max(self._config.INITIAL_SCORE, self._config.VALID_SCORE)
+
+    def _add_args(self, proxy: Union[str, ProxyModel], score: Optional[float] = None) -> list:
+        """
+        构造 _ADD_SCRIPT 参数
+
+        Args:
+            proxy: 代理地址或代理模型
+            score: 指定评分, 为空时代理模型取 get_score(), 纯地址取 _address_score
+
+        Returns:
+            [评分, 代理地址, 详情, 是否覆盖]
+        """
+        if isinstance(proxy, ProxyModel):
+            return [
+                score or proxy.get_score(),
+                f"{proxy.ip}:{proxy.port}",
+                self._serializer.serialize(proxy),
+                1,
+            ]
+        return [score or self._address_score, proxy, proxy, 0]
+
     async def add(self, proxy: Union[str, ProxyModel], score: Optional[float] = None) -> bool:
         """
-        添加代理到代理池
+        添加代理到代理池, 已存在的代理模型以最新评分与详情覆盖
 
         Args:
             proxy: 代理地址或代理模型
             score: 代理评分
 
         Returns:
-            是否添加成功
+            是否新增代理
         """
         try:
             def _add():
-                with self._pool.get_connection() as conn:
-                    # 处理不同类型输入
-                    if isinstance(proxy, ProxyModel):
-                        proxy_key = f"{proxy.ip}:{proxy.port}"
-                        proxy_score = score or proxy.success_rate * 100
-                        proxy_data = self._serializer.serialize(proxy)
-                    else:
-                        proxy_key = proxy
-                        proxy_score = score or self._config.INITIAL_SCORE
-                        proxy_data = proxy_key
-
-                    # 防止重复添加
-                    if not conn.zscore(self._config.REDIS_KEY, proxy_key):
-                        pipeline = conn.pipeline()
-                        pipeline.zadd(self._config.REDIS_KEY, {proxy_key: proxy_score})
-                        pipeline.hset(f"{self._config.REDIS_KEY}:details", proxy_key, proxy_data)
-                        return all(pipeline.execute())
-                    return False
+                # 存在性判断与写入在服务端一次完成
+                return bool(self._add_script(
+                    keys=[self._config.REDIS_KEY, self._details_key],
+                    args=self._add_args(proxy, score),
+                ))
             return await self._run_sync(_add)
         except Exception as e:
             self._logger.error(f"添加代理 {proxy} 失败: {e}")
             return False
 
+    async def add_many(self, proxies: List[Union[str, ProxyModel]]) -> int:
+        """
+        批量添加代理, 单次管道提交, 已存在的代理模型以最新评分与详情覆盖
+
+        Args:
+            proxies: 代理地址或代理模型列表
+
+        Returns:
+            新增的代理数量
+        """
+        if not proxies:
+            return 0
+
+        try:
+            def _add_many():
+                keys = [self._config.REDIS_KEY, self._details_key]
+                with self._pool.get_connection() as conn:
+                    pipeline = conn.pipeline(transaction=False)
+                    # 与 add() 同一脚本, 代理模型刷新评分, 纯地址不覆盖已有数据
+                    for proxy in proxies:
+                        self._add_script(keys=keys, args=self._add_args(proxy), client=pipeline)
+                    return sum(1 for added in pipeline.execute() if added)
+            return await self._run_sync(_add_many)
+        except Exception as e:
+            self._logger.error(f"批量添加代理失败: {e}")
+            return 0
+
     async def remove(self, proxy: Union[str, ProxyModel]) -> bool:
         """
         从代理池移除代理
@@ -231,6 +364,40 @@ class RedisProxyClient:
             self._logger.error(f"移除代理 {proxy} 失败: {e}")
             return False
 
+    async def remove_many(self, proxies: List[Union[str, ProxyModel]], chunk_size: int = 500) -> int:
+        """
+        批量移除代理, 按块提交管道, 避免单次命令过大阻塞 Redis
+
+        Args:
+            proxies: 代理地址或代理模型列表
+            chunk_size: 每个管道提交的代理数量
+
+        Returns:
+            移除的代理数量
+        """
+        if not proxies:
+            return 0
+
+        proxy_keys = [
+            proxy if isinstance(proxy, str) else f"{proxy.ip}:{proxy.port}"
+            for proxy in proxies
+        ]
+        try:
+            def _remove_many():
+                removed = 0
+                with self._pool.get_connection() as conn:
+                    for i in range(0, len(proxy_keys), chunk_size):
+                        chunk = proxy_keys[i:i + chunk_size]
+                        pipeline = conn.pipeline(transaction=False)
+                        pipeline.zrem(self._config.REDIS_KEY, *chunk)
+                        pipeline.hdel(self._details_key, *chunk)
+                        removed += pipeline.execute()[0]
+                return removed
+            return await self._run_sync(_remove_many)
+        except Exception as e:
+            self._logger.error(f"批量移除代理失败: {e}")
+            return 0
+
     async def update_score(
         self, proxy: Union[str, ProxyModel], score: Optional[float] = None
     ) -> bool:
@@ -249,7 +416,7 @@ class RedisProxyClient:
                 with self._pool.get_connection() as conn:
                     if isinstance(proxy, ProxyModel):
                         proxy_key = f"{proxy.ip}:{proxy.port}"
-                        proxy_score = score or proxy.success_rate * 100
+                        proxy_score = score or proxy.get_score()
                         # 更新详细信息
                         proxy_data = self._serializer.serialize(proxy)
                         pipeline = conn.pipeline()
@@ -258,43 +425,135 @@ class RedisProxyClient:
                         return all(pipeline.execute())
                     else:
                         proxy_key = proxy
-                        proxy_score = score or self._config.INITIAL_SCORE
+                        proxy_score = score or self._address_score
                         return bool(conn.zadd(self._config.REDIS_KEY, {proxy_key: proxy_score}))
             return await self._run_sync(_update)
         except Exception as e:
             self._logger.error(f"更新代理 {proxy} 评分失败: {e}")
             return False
 
-    async def random_proxy(self, min_score: Optional[float] = None) -> Optional[str]:
+    def _load_details(self, keys: List[bytes], details: List[Optional[bytes]]) -> List[Union[str, ProxyModel]]:
         """
-        随机获取一个代理
+        将 HMGET 取回的详情还原为代理对象, 无详情(或仅存了地址)时退回代理地址
+
+        Args:
+            keys: 代理地址列表 (未解码)
+            details: 与 keys 一一对应的详情数据 (未解码)
+
+        Returns:
+            代理对象或代理地址列表
+        """
+        return [
+            self._serializer.deserialize(data) if data and data != key else key.decode()
+            for key, data in zip(keys, details)
+        ]
+
+    async def update_scores(self, deltas: Dict[str, float]) -> int:
+        """
+        批量调整代理评分, 结果限制在 [MIN_SCORE, MAX_SCORE], 单次往返完成
+
+        Args:
+            deltas: {代理地址: 评分增量}
+
+        Returns:
+            更新的代理数量 (不存在的代理不计)
+        """
+        if not deltas:
+            return 0
+
+        args = [self._config.MIN_SCORE, self._config.MAX_SCORE]
+        for proxy_key, delta in deltas.items():
+            args.extend((proxy_key, delta))
+        try:
+            return await self._run_sync(
+                lambda: self._update_scores_script(keys=[self._config.REDIS_KEY], args=args)
+            )
+        except Exception as e:
+            self._logger.error(f"批量更新代理评分失败: {e}")
+            return 0
+
+    async def random_proxies(self, count: int = 1, min_score: Optional[float] = None) -> List[str]:
+        """
+        随机获取多个代理, 筛选与抽样在服务端一次完成
 
         Args:
+            count: 获取数量
             min_score: 最低评分要求
 
         Returns:
-            代理地址或 None
+            代理地址列表 (ip:port), 只读评分集合, 不读取详情
         """
         try:
-            with self._pool.get_connection() as conn:
-                min_score = min_score or self._config.MIN_SCORE
-                # 获取符合评分要求的代理
-                proxies = conn.zrangebyscore(
-                    self._config.REDIS_KEY,
-                    min_score,
-                    float("inf"),
+            min_score = min_score or self._config.MIN_SCORE
+            keys = await self._run_sync(
+                lambda: self._random_script(
+                    keys=[self._config.REDIS_KEY],
+                    args=[min_score, count, random.getrandbits(31)],
                 )
-                if proxies:
-                    proxy_key = random.choice(proxies)
-                    # 获取详细信息
-                    proxy_data = conn.hget(f"{self._config.REDIS_KEY}:details", proxy_key)
-                    if proxy_data:
-                        return str(self._serializer.deserialize(proxy_data))
-                    return proxy_key
-                return None
+            )
+            return [key.decode() for key in keys]
         except Exception as e:
             self._logger.error(f"随机获取代理失败: {e}")
-            return None
+            return []
+
+    async def top_proxies(self, count: int = 1, min_score: Optional[float] = None) -> List[str]:
+        """
+        按评分从高到低获取代理, 只返回不低于有效分数的代理
+
+        Args:
+            count: 获取数量
+            min_score: 最低评分要求, 默认 VALID_SCORE
+
+        Returns:
+            代理地址列表 (ip:port), 只读评分集合, 不读取详情
+        """
+        try:
+            min_score = self._config.VALID_SCORE if min_score is None else min_score
+
+            def _top():
+                with self._pool.get_connection() as conn:
+                    return conn.zrevrangebyscore(
+                        self._config.REDIS_KEY, "+inf", min_score, start=0, num=count
+                    )
+            return [key.decode() for key in await self._run_sync(_top)]
+        except Exception as e:
+            self._logger.error(f"获取高分代理失败: {e}")
+            return []
+
+    async def remove_below_score(self, score: Optional[float] = None) -> int:
+        """
+        移除评分低于阈值的代理, 筛选与删除在服务端一次完成
+
+        Args:
+            score: 评分阈值, 默认 VALID_SCORE
+
+        Returns:
+            移除的代理数量
+        """
+        try:
+            score = self._config.VALID_SCORE if score is None else score
+            return await self._run_sync(
+                lambda: self._remove_below_script(
+                    keys=[self._config.REDIS_KEY, self._details_key],
+                    args=[score],
+                )
+            )
+        except Exception as e:
+            self._logger.error(f"移除低分代理失败: {e}")
+            return 0
+
+    async def random_proxy(self, min_score: Optional[float] = None) -> Optional[str]:
+        """
+        随机获取一个代理
+
+        Args:
+            min_score: 最低评分要求
+
+        Returns:
+            代理地址或 None
+        """
+        proxies = await self.random_proxies(1, min_score)
+        return proxies[0] if proxies else None
 
     async def get_all_proxies(self) -> List[Union[str, ProxyModel]]:
         """
@@ -304,16 +563,11 @@ class RedisProxyClient:
             所有代理地址列表
         """
         try:
-            with self._pool.get_connection() as conn:
-                proxy_keys = conn.zrange(self._config.REDIS_KEY, 0, -1)
-                result = []
-                for key in proxy_keys:
-                    proxy_data = conn.hget(f"{self._config.REDIS_KEY}:details", key)
-                    if proxy_data:
-                        result.append(self._serializer.deserialize(proxy_data))
-                    else:
-                        result.append(key)
-                return result
+            conn = self.redis
+            proxy_keys = conn.zrange(self._config.REDIS_KEY, 0, -1)
+            if not proxy_keys:
+                return []
+            return self._load_details(proxy_keys, conn.hmget(self._details_key, proxy_keys))
         except Exception as e:
             self._logger.error(f"获取所有代理失败: {e}")
             return []
@@ -348,16 +602,11 @@ class RedisProxyClient:
             符合评分范围的代理列表
         """
         try:
-            with self._pool.get_connection() as conn:
-                proxy_keys = conn.zrangebyscore(self._config.REDIS_KEY, min_score, max_score)
-                result = []
-                for key in proxy_keys:
-                    proxy_data = conn.hget(f"{self._config.REDIS_KEY}:details", key)
-                    if proxy_data:
-                        result.append(self._serializer.deserialize(proxy_data))
-                    else:
-                        result.append(key)
-                return result
+            conn = self.redis
+            proxy_keys = conn.zrangebyscore(self._config.REDIS_KEY, min_score, max_score)
+            if not proxy_keys:
+                return []
+            return self._load_details(proxy_keys, conn.hmget(self._details_key, proxy_keys))
         except Exception as e:
             self._logger.error(f"获取评分范围代理失败: {e}")
             return []
@@ -397,7 +646,7 @@ class RedisProxyClient:
                 pipeline = conn.pipeline()
                 for proxy in proxies:
                     proxy_key = f"{proxy.ip}:{proxy.port}"
-                    proxy_score = proxy.success_rate * 100
+                    proxy_score = proxy.get_score()
                     # 检查是否存在
                     if not conn.zscore(self._config.REDIS_KEY, proxy_key):
                         pipeline.zadd(self._config.REDIS_KEY, {proxy_key: proxy_score})
@@ -419,17 +668,28 @@ class RedisProxyClient:
         - 提高响应速度
         """
 
-        def __init__(self):
-            self._local_cache = {}
-            self._cache_ttl = 300
+        def __init__(self, ttl: float = 300, maxsize: int = 128):
+            self._local_cache: Dict[str, tuple] = {}  # key -> (过期时间, 值)
+            self._cache_ttl = ttl
+            self._maxsize = maxsize
 
         async def get_cached(self, key: str) -> Any:
-            """获取缓存的代理数据"""
-            pass
+            """获取缓存的代理数据, 不存在或已过期时返回 None"""
+            entry = self._local_cache.get(key)
+            if entry is None:
+                return None
+            expire_at, value = entry
+            if expire_at < time.monotonic():
+                self._local_cache.pop(key, None)
+                return None
+            return value
 
         async def set_cached(self, key: str, value: Any):
-            """设置代理缓存"""
-            pass
+            """设置代理缓存, 超出容量时淘汰最早写入的条目"""
+            self._local_cache.pop(key, None)
+            while len(self._local_cache) >= self._maxsize:
+                self._local_cache.pop(next(iter(self._local_cache)))
+            self._local_cache[key] = (time.monotonic() + self._cache_ttl, value)
 
     class RedisMetricsCollector:
         """
@@ -15,14 +15,21 @@ Changed history:            代理验证模块: 验证代理可用性
 import asyncio
 import logging
 import sys
+import time
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from itertools import compress
 from typing import List, Optional
 
 import aiohttp
 from aiohttp import ClientTimeout, TCPConnector
 
+try:
+    import orjson as json_backend  # 可选依赖, 解析更快
+except ImportError:
+    import json as json_backend
+
 from proxy_pool.models.proxy_model import ProxyModel
 from proxy_pool.utils.config import ProxyConfig
 from proxy_pool.utils.logger import setup_logger
@@ -51,13 +58,24 @@ class ValidationResult:
 class ProxyValidator:
     """代理验证 qiqi"""
 
+    # 返回出口 IP 的 JSON 接口, 解析响应体确认代理真实转发
+    JSON_TEST_URLS = frozenset({
+        "http://httpbin.org/ip",
+        "http://api.ipify.org?format=json",
+        "http://ip.sb/api",
+    })
+
+    # 响应体读取上限 (字节)
+    MAX_BODY_SIZE = 512
+
     def __init__(
         self,
         config: ProxyConfig = ProxyConfig(),
         timeout: float = 5.0,
-        concurrent_limit: int = 20,
+        concurrent_limit: Optional[int] = None,
         retry_times: int = 3,
         min_success_rate: float = 0.3,
+        session: Optional[aiohttp.ClientSession] = None,
     ):
         """
         初始化代理验证器
@@ -65,16 +83,17 @@ class ProxyValidator:
         Args:
             config: 代理配置
             timeout: 超时时间
-            concurrent_limit: 并发数限制
+            concurrent_limit: 并发数限制, 默认取 config.VALIDATE_CONCURRENCY
             retry_times: 重试次数
             min_success_rate: 最低成功率
+            session: 外部共享的 HTTP 会话, 由调用方负责关闭; 不传则自建
         """
         self.config = config
         self.logger = setup_logger("validator")
 
         # 验证配置
         self.timeout = ClientTimeout(total=timeout)
-        self.concurrent_limit = concurrent_limit
+        self.concurrent_limit = concurrent_limit or config.VALIDATE_CONCURRENCY
         self.retry_times = retry_times
         self.min_success_rate = min_success_rate
 
@@ -88,6 +107,10 @@ class ProxyValidator:
             "http://ip.sb/api",
         ]
 
+        # 共享 HTTP 会话, 未从外部传入时首次使用才创建
+        self._session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
+
         # 统计配置
         self._stats = {
             "total": 0,
@@ -114,28 +137,79 @@ class ProxyValidator:
         return f"{proxy.protocol}://{proxy.ip}:{proxy.port}"
 
     def _create_session(self) -> aiohttp.ClientSession:
-        """创建 HTTP 会话"""
+        """创建 HTTP 会话, 保持长连接以复用 TCP / TLS 握手"""
         return aiohttp.ClientSession(
             timeout=self.timeout,
-            connector=TCPConnector(ssl=False, force_close=True),
+            connector=TCPConnector(
+                ssl=False,
+                limit=self.concurrent_limit,  # 连接数与并发数一致
+                limit_per_host=0,  # 代理各不相同, 不限制单主机连接
+                ttl_dns_cache=300,  # DNS 缓存时间
+                keepalive_timeout=60,  # 空闲连接保活时间
+            ),
         )
 
-    async def _check_url_accessibility(self, url: str) -> bool:
+    async def get_session(self) -> aiohttp.ClientSession:
+        """获取共享 HTTP 会话"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        """关闭自建的 HTTP 会话, 外部传入的会话由调用方关闭"""
+        if not self._owns_session:
+            return
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _check_url_accessibility(
+        self, session: aiohttp.ClientSession, url: str
+    ) -> bool:
         """检查测试 url 有效性"""
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(url) as response:
-                    return response.status == 200
-        except:
+            async with session.head(
+                url,
+                allow_redirects=True,
+                timeout=self.timeout,
+            ) as response:
+                return response.status < 400
+        except Exception:
             return False
 
     async def _validate_test_urls(self) -> List[str]:
-        """验证并过滤测试 url"""
-        valid_urls = []
-        for url in self._test_urls:
-            if await self._check_url_accessibility(url):
-                valid_urls.append(url)
-        return valid_urls
+        """并发验证并过滤测试 url"""
+        session = await self.get_session()
+        results = await asyncio.gather(
+            *[self._check_url_accessibility(session, url) for url in self._test_urls]
+        )
+        return [url for url, is_ok in zip(self._test_urls, results) if is_ok]
+
+    async def _check_response_body(
+        self, response: aiohttp.ClientResponse, test_url: str
+    ) -> bool:
+        """
+        检查响应内容是否有效
+
+        JSON 接口要求返回出口 IP, 其他站点只要求内容非空
+
+        Args:
+            response: 响应对象
+            test_url: 测试地址
+
+        Returns:
+            bool: 响应内容是否有效
+        """
+        body = await response.content.read(self.MAX_BODY_SIZE)
+        if test_url not in self.JSON_TEST_URLS:
+            return bool(body)
+
+        try:
+            data = json_backend.loads(body)
+        except ValueError:
+            return False
+        return isinstance(data, dict) and bool(data.get("ip") or data.get("origin"))
 
     def _update_stats(self, result: ValidationResult):
         """更新统计信息"""
@@ -167,38 +241,38 @@ class ProxyValidator:
 
         for attempt in range(self.retry_times):
             try:
+                session = await self.get_session()
                 start_time = asyncio.get_event_loop().time()
-                async with self._create_session() as session:
-                    async with session.get(
-                        test_url,
-                        proxy=proxy_url,
-                        ssl=False,  # 禁用 SSL 验证
-                        allow_redirects=True,  # 允许重定向
-                    ) as response:
-                        response_time = asyncio.get_event_loop().time() - start_time
-
-                        if response.status < 400:
-                            content = await response.text(errors="ignore")
-                            if content:
-                                result = ValidationResult(
-                                    is_valid=True,
-                                    response_time=response_time,
-                                    status_code=response.status,
-                                )
-                                self._update_stats(result)
-                                proxy.update_stats(
-                                    is_success=True,
-                                    response_time=response_time,
-                                    status_code=response.status,
-                                )
-                                self.logger.debug(
-                                    f"代理验证成功: {proxy_url} "
-                                    f"(响应时间: {response_time:.2f}s, "
-                                    f"状态码: {response.status}, "
-                                    f"尝试次数: {attempt + 1})"
-                                )
-
-                                return result
+                async with session.get(
+                    test_url,
+                    proxy=proxy_url,
+                    timeout=self.timeout,  # 共享会话可能来自外部, 超时按请求指定
+                    ssl=False,  # 禁用 SSL 验证
+                    allow_redirects=True,  # 允许重定向
+                ) as response:
+                    response_time = asyncio.get_event_loop().time() - start_time
+
+                    if response.status < 400:
+                        if await self._check_response_body(response, test_url):
+                            result = ValidationResult(
+                                is_valid=True,
+                                response_time=response_time,
+                                status_code=response.status,
+                            )
+                            self._update_stats(result)
+                            proxy.update_stats(
+                                is_success=True,
+                                response_time=response_time,
+                                status_code=response.status,
+                            )
+                            self.logger.debug(
+                                f"代理验证成功: {proxy_url} "
+                                f"(响应时间: {response_time:.2f}s, "
+                                f"状态码: {response.status}, "
+                                f"尝试次数: {attempt + 1})"
+                            )
+
+                            return result
 
                 result = ValidationResult(
                     is_valid=False,
@@ -265,6 +339,40 @@ class ProxyValidator:
 
         return result
 
+    async def check_proxy(
+        self, proxy: ProxyModel, test_url: Optional[str] = None, now: Optional[float] = None
+    ) -> bool:
+        """
+        验证单个代理并判断是否可入库, 异常时视为无效
+
+        Args:
+            proxy: 代理对象
+            test_url: 测试 url
+            now: 评分时间 (epoch 秒), 批量验证时统一传入
+
+        Returns:
+            bool: 代理是否有效
+        """
+        return await self._probe(proxy, test_url) and proxy.is_valid(now)  # ProxyModel 的 is_valid 方法
+
+    async def _probe(self, proxy: ProxyModel, test_url: Optional[str] = None) -> bool:
+        """
+        仅发起验证请求, 不判断评分, 异常时视为无效
+
+        Args:
+            proxy: 代理对象
+            test_url: 测试 url
+
+        Returns:
+            bool: 验证请求是否成功
+        """
+        try:
+            result = await self.validate_single_proxy(proxy, test_url or self.test_urls[0])
+            return result.is_valid
+        except Exception as e:
+            self.logger.error(f"代理 {proxy} 验证任务异常: {e}")
+            return False
+
     async def validate_proxy(
         self, proxies: List[ProxyModel], test_url: Optional[str] = None
     ) -> List[ProxyModel]:
@@ -285,20 +393,37 @@ class ProxyValidator:
         # print 插桩测试
         # print(f"test_url = {test_url} \nproxies = {proxies}")
 
-        # 使用信号量限制并发
-        semaphore = asyncio.Semaphore(self.concurrent_limit)
-        valid_proxies = []
-
-        async def _validate_with_semaphore(proxy: ProxyModel):
-            async with semaphore:
-                url = test_url or self.test_urls[0]
-                is_valid = await self.validate_single_proxy(proxy, url)
-                if is_valid and proxy.is_valid():  # ProxyModel 的 is_valid 方法
-                    valid_proxies.append(proxy)
+        # 固定数量的 worker 从队列取代理, 内存占用只与并发数相关
+        queue: asyncio.Queue = asyncio.Queue()
+        for proxy in proxies:
+            queue.put_nowait(proxy)
+
+        url = test_url or self.test_urls[0]
+        probed_proxies = []
+        now = time.time()  # 本轮统一的评分时间
+
+        async def _worker():
+            while True:
+                proxy = await queue.get()
+                try:
+                    if await self._probe(proxy, url):
+                        probed_proxies.append(proxy)
+                finally:
+                    queue.task_done()
+
+        workers = [
+            asyncio.create_task(_worker())
+            for _ in range(min(self.concurrent_limit, len(proxies)))
+        ]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
 
-        # 创建代理验证任务
-        tasks = [_validate_with_semaphore(proxy) for proxy in proxies]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        # 请求成功的代理整体做一次向量化有效性判断
+        valid_proxies = list(compress(probed_proxies, ProxyModel.valid_mask(probed_proxies, now)))
 
         self.logger.info(
             f"单 URL 验证完成:"
@@ -429,7 +554,10 @@ if __name__ == "__main__":
         # 运行测试
         if sys.platform == 'win32':
             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-        await run_test_cases()
+        try:
+            await run_test_cases()
+        finally:
+            await validator.close()
 
 
     # 执行测试
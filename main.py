@@ -1,11 +1,16 @@
 import asyncio
 import argparse
+import random
+import re
+import signal
 import sys
+import time
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Tuple
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query, Request
+import aiohttp
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from pydantic import BaseModel
 from prometheus_client import Counter, Gauge
 import uvicorn
@@ -18,6 +23,7 @@ from proxy_pool.core.cleaner import ProxyCleaner
 # from proxy_pool.models.proxy_model import ProxyModel
 from proxy_pool.utils.config import Settings
 from proxy_pool.utils.logger import setup_logger
+from proxy_pool.utils.web_request import WebRequest
 
 
 # 全局配置
@@ -27,6 +33,19 @@ settings = Settings()
 storage = RedisProxyClient()
 
 
+# /proxies 响应缓存, 同一 count 的请求 1 秒内复用结果
+proxy_cache = RedisProxyClient.ProxyCache(ttl=1.0, maxsize=16)
+
+
+def get_storage() -> RedisProxyClient:
+    """ 注入全局共享的 Redis 客户端 """
+    return storage
+
+
+# 路径中的数字段统一替换为 :id, 控制指标标签基数
+_PATH_ID_PATTERN = re.compile(r"/\d+(?=/|$)")
+
+
 class Metrics:
     """ 监控指标 """
     def __init__(self):
@@ -47,6 +66,28 @@ class Metrics:
             "Total number of API requests",
             ["endpoint", "method"]
         )
+        self._label_cache: Dict[Tuple[str, str], Counter] = {}
+
+    def api_request_counter(self, path: str, method: str) -> Counter:
+        """
+        获取 (路径, 方法) 对应的已绑定标签计数器, 避免每个请求重复 labels()
+
+        Args:
+            path: 请求路径
+            method: 请求方法
+
+        Returns:
+            已绑定标签的计数器
+        """
+        key = (path, method)
+        counter = self._label_cache.get(key)
+        if counter is None:
+            endpoint = _PATH_ID_PATTERN.sub("/:id", path)
+            counter = self._label_cache[key] = self.api_requests.labels(
+                endpoint=endpoint,
+                method=method
+            )
+        return counter
 
 
 metrics = Metrics()
@@ -62,60 +103,167 @@ class ProxyResponse(BaseModel):
 class ProxyPoolApplication:
     def __init__(self):
         self.config = settings
-        self.fetcher = ProxyFetcher()
-        self.validator = ProxyValidator()
+        # 应用级共享 HTTP 会话, 获取与验证跨周期复用连接和 DNS 缓存
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=500,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+        )
+        self.fetcher = ProxyFetcher(session=self._session)
+        self.validator = ProxyValidator(session=self._session)
         self.storage = storage  # 共享的 Redis 客户端
-        self.cleaner = ProxyCleaner()
-        self._running = True  # 控制运行状态
+        # 清理器复用应用级验证器与获取器, 不再各自创建会话
+        self.cleaner = ProxyCleaner(
+            storage=self.storage,
+            validator=self.validator,
+            fetcher=self.fetcher,
+        )
+        self._shutdown = asyncio.Event()  # 停止信号, 可随时打断循环等待
+        self._closed = False
+
+    def _install_signal_handlers(self):
+        """ SIGTERM 时触发停止信号, 平台不支持时忽略 """
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self._shutdown.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows 事件循环不支持 add_signal_handler
+
+    async def _wait(self, interval: float) -> bool:
+        """
+        带随机抖动的等待, 收到停止信号时提前返回
+
+        Args:
+            interval: 等待间隔(秒)
+
+        Returns:
+            是否收到停止信号
+        """
+        timeout = max(0.0, interval + random.uniform(-5, 5))  # 抖动避免多实例同时重启后同步请求
+        try:
+            await asyncio.wait_for(self._shutdown.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
 
     async def stop(self):
         """ 关闭程序 """
-        self._running = False
+        self._shutdown.set()
+        if self._closed:
+            return
+        self._closed = True
         # 清理资源
         logger.info("正在关闭代理池应用...")
         self.storage.close()
 
+        await self.cleaner.close()
         await self.fetcher.close()
+        await self.validator.close()
+        await self._session.close()
+        await WebRequest.close_shared()
         logger.info("代理池应用已关闭")
 
     async def run(self):
         """ 主运行流程 """
+        self._install_signal_handlers()
         try:
-            while self._running:
+            while not self._shutdown.is_set():
                 try:
                     await self._run_cycle()
+                    interval = self.config.FETCH_INTERVAL
                 except Exception as e:
                     logger.error(f"代理池运行异常: {e}")
-                    await asyncio.sleep(60)
+                    interval = 60
+
+                # 等待下一次循环
+                if await self._wait(interval):
+                    break
         finally:
             await self.stop()
 
+    @staticmethod
+    async def _run_stages(*coros):
+        """
+        并发运行各阶段, 任一阶段异常或整体被取消时取消其余阶段并等待其退出
+
+        Args:
+            *coros: 阶段协程
+        """
+        tasks = [asyncio.ensure_future(coro) for coro in coros]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
     async def _run_cycle(self):
-        """ 单次运行循环 """
+        """
+        单次运行循环
+
+        获取 -> 验证 -> 存储 三个阶段经队列衔接并发运行,
+        代理源返回即开始验证, 验证通过即分批入库
+        """
         try:
             # 更新指标
             metrics.fetch_counter.inc()
 
+            worker_count = self.validator.concurrent_limit
+            raw_queue: asyncio.Queue = asyncio.Queue(maxsize=worker_count * 2)
+            valid_queue: asyncio.Queue = asyncio.Queue()
+
             # 1. 获取代理
-            raw_proxies = await self.fetcher.fetch_all()
-            logger.info(f"获取原始代理 {len(raw_proxies)} 个")
-            metrics.proxy_total.set(len(raw_proxies))
+            # 结束标记只在阶段正常完成时投放; 异常或取消时其余阶段会被一并取消,
+            # 此时下游已不再消费, 等待有界队列空位会永久阻塞
+            async def fetch_stage():
+                fetched = await self.fetcher.fetch_to_queue(raw_queue)
+                logger.info(f"获取原始代理 {fetched} 个")
+                metrics.proxy_total.set(fetched)
+                for _ in range(worker_count):
+                    await raw_queue.put(None)  # 通知验证 worker 结束
 
             # 2. 验证代理
-            valid_proxies = await self.validator.validate_proxy(raw_proxies)
-            logger.info(f"验证通过代理 {len(valid_proxies)} 个")
-            metrics.proxy_valid.set(len(valid_proxies))
-
-            # 3. 存储代理
-            for proxy in valid_proxies:
-                await self.storage.add(proxy)
+            async def validate_worker():
+                now = time.time()
+                while (proxy := await raw_queue.get()) is not None:
+                    if await self.validator.check_proxy(proxy, now=now):
+                        await valid_queue.put(proxy)
+
+            async def validate_stage():
+                await self._run_stages(*(validate_worker() for _ in range(worker_count)))
+                await valid_queue.put(None)  # 通知存储阶段结束
+
+            # 3. 存储代理, 攒满一批或 0.5s 无新代理时提交
+            async def store_stage():
+                batch = []
+                valid = added = 0
+                finished = False
+                while not finished:
+                    try:
+                        proxy = await asyncio.wait_for(valid_queue.get(), timeout=0.5)
+                        if proxy is None:
+                            finished = True
+                        else:
+                            batch.append(proxy)
+                            if len(batch) < self.config.VALIDATE_BATCH_SIZE:
+                                continue
+                    except asyncio.TimeoutError:
+                        pass
+                    if batch:
+                        valid += len(batch)
+                        added += await self.storage.add_many(batch)
+                        batch = []
+
+                logger.info(f"验证通过代理 {valid} 个, 新增代理 {added} 个")
+                metrics.proxy_valid.set(valid)
+
+            await self._run_stages(fetch_stage(), validate_stage(), store_stage())
 
             # 4. 清理无效代理
             await self.cleaner.clean_invalid_proxies()
 
-            # 等待下一次循环
-            await asyncio.sleep(self.config.FETCH_INTERVAL)
-
         except Exception as e:
             logger.error(f"代理池运行循环发生异常: {e}")
             raise
@@ -143,10 +291,7 @@ app = FastAPI(
 @app.middleware("http")
 async def track_requests(request: Request, call_next):
     """ 请求追踪中间件 """
-    metrics.api_requests.labels(
-        endpoint=request.url.path,
-        method=request.method
-    ).inc()
+    metrics.api_request_counter(request.url.path, request.method).inc()
     return await call_next(request)
 
 
@@ -154,10 +299,16 @@ async def track_requests(request: Request, call_next):
 async def get_proxies(
     count: int = Query(default=10, ge=1, le=100),
     # protocol: Optional[str] = Query(default=None, regex="^(http|https)?$")
+    proxy_storage: RedisProxyClient = Depends(get_storage),
 ):
     """ 获取代理列表 """
     try:
-        proxies = await storage.random_proxy(count)
+        cache_key = f"proxies:{count}"
+        proxies = await proxy_cache.get_cached(cache_key)
+        if proxies is None:
+            proxies = await proxy_storage.top_proxies(count)
+            if proxies:
+                await proxy_cache.set_cached(cache_key, proxies)
         if not proxies:
             raise HTTPException(
                 status_code=404,
@@ -168,6 +319,8 @@ async def get_proxies(
             count=len(proxies),
             timestamp=datetime.now()
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("获取代理失败")
         raise HTTPException(
@@ -177,10 +330,10 @@ async def get_proxies(
 
 
 @app.get("/stats")
-async def get_stats():
+async def get_stats(proxy_storage: RedisProxyClient = Depends(get_storage)):
     """ 获取统计信息 """
     try:
-        total = await storage.get_proxy_count()
+        total = await proxy_storage.get_proxy_count()
         return {
             "total": total,
             "fetch_count": metrics.fetch_counter.value.get(),
@@ -219,24 +372,23 @@ async def run_fetch_mode():
         logger.info(f"获取代理 {len(raw_proxies)} 个")
     finally:
         await fetcher.close()
+        await WebRequest.close_shared()
 
 
 async def run_validate_mode():
     """
     模式: validate - 验证代理
     """
+    validator = ProxyValidator()
     try:
-        validator = ProxyValidator()
         proxies_str = await storage.get_all_proxies()
         valid_proxies = await validator.validate_proxy(proxies_str)
-
-        async with storage.pipeline() as pipe:
-            for proxy in valid_proxies:
-                await pipe.add(proxy)
+        await storage.add_many(valid_proxies)
 
         logger.info(f"验证有效代理 {len(valid_proxies)} 个")
     finally:
-        await storage.close()
+        await validator.close()
+        storage.close()
 
 
 async def run_serve_mode():
@@ -256,6 +408,15 @@ async def run_serve_mode():
         await app_.stop()
 
 
+def setup_event_loop_policy():
+    """ 优先使用 uvloop 事件循环, 未安装或平台不支持时保持默认 """
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 async def main():
     # 解析命令行参数
     parser = argparse.ArgumentParser(description="代理池服务")
@@ -297,10 +458,16 @@ async def main():
         sys.exit(1)
 
 
-if __name__ == "__main__":
+def cli():
+    """ 命令行入口: 选择事件循环后启动整个应用 """
+    setup_event_loop_policy()
     try:
         asyncio.run(main())  # 启动整个应用
     except KeyboardInterrupt:
         logger.info("服务已手动停止")
     except Exception as error:
         logger.error(f"服务启动失败: {error}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -11,13 +11,41 @@ Changed history:            定义代理模型,包含统计特征
 ----------------------------------------------------------------
 """
 
-from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
-import ipaddress
+from collections import deque
+from dataclasses import InitVar, dataclass, field
+from itertools import islice
+from typing import Optional, Dict, Any, Deque, List, Sequence, TYPE_CHECKING
+from datetime import datetime
 import json
+import socket
+import time
 from enum import Enum
 
+try:
+    import orjson  # 可选依赖, 序列化更快
+
+    def _dumps_bytes(data: Dict[str, Any]) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps_bytes(data: Dict[str, Any]) -> bytes:
+        return json.dumps(data, ensure_ascii=False).encode()
+
+    _loads = json.loads
+
+try:
+    import msgpack  # 可选依赖, 二进制存储体积更小
+except ImportError:
+    msgpack = None
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# 支持的代理协议
+_PROTOCOLS = frozenset({'http', 'https', 'socks4', 'socks5'})
+
 
 class ProxyStatus(Enum):
     """ 代理状态枚举 """
@@ -37,7 +65,7 @@ class ProxyAnonymity(Enum):
     UNKNOWN = "unknown"  # 未知
 
 
-@dataclass
+@dataclass(slots=True, eq=False)  # 无 __dict__, 降低大量实例的内存与属性访问开销; 相等性由下方 __eq__ 定义
 class ProxyModel:
     """
     代理模型,封装代理详细信息和统计特征
@@ -57,7 +85,7 @@ class ProxyModel:
     protocol: str = "http"
     success_rate: float = 0.0
     avg_response_time: float = 0.0
-    last_check_time: datetime = field(default_factory=datetime.now)
+    last_check_time: float = field(default_factory=time.time)  # 时间字段均为 epoch 秒
     consecutive_failed_times: int = 0
     total_requests: int = 0
     location: Optional[str] = None
@@ -65,15 +93,39 @@ class ProxyModel:
     last_status_code: Optional[int] = None
     tags: Dict[str, Any] = field(default_factory=dict)
     status: ProxyStatus = ProxyStatus.UNKNOWN
-    created_time: datetime = field(default_factory=datetime.now)
-    last_success_time: Optional[datetime] = None
-    response_times: List[float] = field(default_factory=list)
+    created_time: float = field(default_factory=time.time)
+    last_success_time: Optional[float] = None
+    response_times: Deque[float] = field(default_factory=deque)
     max_response_times: int = 100  # 保存最近 100 次响应时间
     fail_count: Optional[int] = None
-
-    def __post_init__(self):
-        """ 验证初始化参数 """
-        self.validate()
+    rt_m2: float = 0.0  # 响应时间与均值差的平方和 (Welford), 用于 O(1) 求方差
+    # 数据来源可信 (如 Redis 中已验证过的数据) 时跳过参数验证
+    skip_validation: InitVar[bool] = False
+    # 评分中与时间无关部分的缓存, 仅在统计数据变化时重算
+    _score_cache: float = field(default=0.0, init=False, repr=False, compare=False)
+    _score_dirty: bool = field(default=True, init=False, repr=False, compare=False)
+    # ip/port/protocol 构造后不再修改, 哈希值只需计算一次
+    _hash: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self, skip_validation: bool):
+        """ 验证并规范化初始化参数 """
+        if not skip_validation:
+            self.validate()
+        self._normalize()
+        self._hash = hash((self.ip, self.port, self.protocol))
+
+    def _normalize(self) -> None:
+        """ 规范化字段类型 """
+        # 兼容传入 datetime 的调用方, 内部统一存 epoch 秒
+        if isinstance(self.last_check_time, datetime):
+            self.last_check_time = self.last_check_time.timestamp()
+        if isinstance(self.created_time, datetime):
+            self.created_time = self.created_time.timestamp()
+        if isinstance(self.last_success_time, datetime):
+            self.last_success_time = self.last_success_time.timestamp()
+        # 定长环形缓冲, 超出 max_response_times 自动淘汰最旧的记录
+        if not isinstance(self.response_times, deque) or self.response_times.maxlen != self.max_response_times:
+            self.response_times = deque(self.response_times, maxlen=self.max_response_times)
         if isinstance(self.anonymity, str):
             self.anonymity = ProxyAnonymity(self.anonymity)
         if isinstance(self.status, str):
@@ -88,16 +140,19 @@ class ProxyModel:
         """
         # 验证IP地址
         try:
-            ipaddress.ip_address(self.ip)
-        except ValueError:
-            raise ValueError(f"无效的IP地址: {self.ip}")
+            socket.inet_pton(socket.AF_INET, self.ip)
+        except (OSError, TypeError):
+            try:
+                socket.inet_pton(socket.AF_INET6, self.ip)
+            except (OSError, TypeError):
+                raise ValueError(f"无效的IP地址: {self.ip}")
 
         # 验证端口
         if not 0 <= self.port <= 65535:
             raise ValueError(f"无效的端口号: {self.port}")
 
         # 验证协议
-        if self.protocol.lower() not in ['http', 'https', 'socks4', 'socks5']:
+        if self.protocol.lower() not in _PROTOCOLS:
             raise ValueError(f"不支持的协议: {self.protocol}")
 
         # 验证统计数据
@@ -117,16 +172,17 @@ class ProxyModel:
             status_code: HTTP状态码
         """
         self.total_requests += 1
+        inv_n = 1.0 / self.total_requests
 
-        # 更新成功率
-        self.success_rate = (
-            self.success_rate * (self.total_requests - 1) + (1 if is_success else 0)
-        ) / self.total_requests
+        # 更新成功率 (增量均值)
+        self.success_rate += ((1.0 if is_success else 0.0) - self.success_rate) * inv_n
 
-        # 更新响应时间
-        self.avg_response_time = (
-            self.avg_response_time * (self.total_requests - 1) + response_time
-        ) / self.total_requests
+        # 更新响应时间 (Welford 增量均值与平方差和)
+        delta = response_time - self.avg_response_time
+        self.avg_response_time += delta * inv_n
+        self.rt_m2 += delta * (response_time - self.avg_response_time)
+
+        self.response_times.append(response_time)
 
         # 更新失败次数
         if is_success:
@@ -139,7 +195,34 @@ class ProxyModel:
             self.last_status_code = status_code
 
         # 更新最后检查时间
-        self.last_check_time = datetime.now()
+        self.last_check_time = time.time()
+        self._score_dirty = True
+
+    @property
+    def response_time_variance(self) -> float:
+        """
+        全部请求响应时间的样本方差, 由 Welford 累计量直接得出
+
+        Returns:
+            float: 响应时间方差, 请求少于两次时为 0
+        """
+        if self.total_requests < 2:
+            return 0.0
+        return self.rt_m2 / (self.total_requests - 1)
+
+    def recent_response_times(self, window: int) -> List[float]:
+        """
+        最近 window 次响应时间 (按时间先后), 从环形缓冲尾部反向读取, 不复制整个缓冲区
+
+        Args:
+            window: 窗口大小
+
+        Returns:
+            List[float]: 最近的响应时间列表
+        """
+        recent = list(islice(reversed(self.response_times), window))
+        recent.reverse()
+        return recent
 
     def _update_status(self, is_success: bool) -> None:
         """
@@ -159,47 +242,112 @@ class ProxyModel:
             elif self.success_rate < 0.3:
                 self.status = ProxyStatus.UNSTABLE
 
-    def get_score(self) -> float:
+    def _base_score(self) -> float:
+        """
+        计算评分中与时间无关的部分 (成功率、响应时间、稳定性), 结果缓存至统计数据变化
+
+        Returns:
+            float: 基础评分 (0-90)
+        """
+        if self._score_dirty:
+            # 基础分数 (40分)
+            base_score = 40.0 * self.success_rate
+
+            # 响应时间分数 (30分)
+            response_score = 30.0 * (1.0 - min(self.avg_response_time / 10.0, 1.0))
+
+            # 稳定性分数 (20分)
+            stability_score = 20.0 * (1 - self.consecutive_failed_times / 5.0)
+
+            self._score_cache = base_score + response_score + stability_score
+            self._score_dirty = False
+        return self._score_cache
+
+    def get_score(self, now: Optional[float] = None) -> float:
         """
         计算代理的性能评分 (0-100)
 
+        Args:
+            now: 当前时间 (epoch 秒), 批量计算时由调用方统一传入, 避免每个代理各取一次
+
         Returns:
             float: 性能评分
         """
         if self.total_requests == 0:
             return 0.0
 
-            # 基础分数 (40分)
-        base_score = 40.0 * self.success_rate
-
-        # 响应时间分数 (30分)
-        response_score = 30.0 * (1.0 - min(self.avg_response_time / 10.0, 1.0))
-
-        # 稳定性分数 (20分)
-        stability_score = 20.0 * (1 - self.consecutive_failed_times / 5.0)
-
         # 时效性分数 (10分)
         time_score = 10.0
         if self.last_success_time:
-            hours_since_success = (datetime.now() - self.last_success_time).total_seconds() / 3600.0
+            now = now or time.time()
+            hours_since_success = (now - self.last_success_time) / 3600.0
             time_score *= max(0.0, 1.0 - hours_since_success / 24.0)  # 24小时内递减
 
-        return min(100.0, max(0.0, base_score + response_score + stability_score + time_score))
+        return min(100.0, max(0.0, self._base_score() + time_score))
 
-    def is_valid(self) -> bool:
+    def is_valid(self, now: Optional[float] = None) -> bool:
         """
         检查代理是否仍然有效
 
+        Args:
+            now: 当前时间 (epoch 秒), 批量检查时由调用方统一传入
+
         Returns:
             bool: 代理是否有效
         """
-        score = self.get_score()
+        now = now or time.time()
+        score = self.get_score(now)
         return (
             score >= 60  # 综合评分大于60
             and self.status != ProxyStatus.FAILED
             and self.status != ProxyStatus.BANNED
-            and (datetime.now() - self.last_check_time) < timedelta(hours=1)  # 1小时内检查过
+            and (now - self.last_check_time) < 3600  # 1小时内检查过
+        )
+
+    @staticmethod
+    def valid_mask(proxies: Sequence["ProxyModel"], now: Optional[float] = None) -> "np.ndarray":
+        """
+        批量判断代理有效性, 结果与逐个调用 is_valid 一致
+
+        按字段组成数组后一次向量化比较, 替代 N 次 Python 级判断, 可配合 itertools.compress 过滤
+
+        Args:
+            proxies: 代理列表
+            now: 当前时间 (epoch 秒), 默认取调用时刻
+
+        Returns:
+            np.ndarray: 与 proxies 一一对应的布尔数组
+        """
+        import numpy as np  # 仅批量判断时需要, 延迟导入
+
+        count = len(proxies)
+        now = now or time.time()
+        rates = np.fromiter((p.success_rate for p in proxies), np.float64, count)
+        avg_rts = np.fromiter((p.avg_response_time for p in proxies), np.float64, count)
+        failed = np.fromiter((p.consecutive_failed_times for p in proxies), np.float64, count)
+        requests = np.fromiter((p.total_requests for p in proxies), np.int64, count)
+        success_times = np.fromiter((p.last_success_time or 0.0 for p in proxies), np.float64, count)
+        check_times = np.fromiter((p.last_check_time for p in proxies), np.float64, count)
+        usable = np.fromiter(
+            (p.status is not ProxyStatus.FAILED and p.status is not ProxyStatus.BANNED for p in proxies),
+            np.bool_, count
+        )
+
+        # 同 _base_score 与 get_score
+        base_scores = (
+            40.0 * rates
+            + 30.0 * (1.0 - np.minimum(avg_rts / 10.0, 1.0))
+            + 20.0 * (1 - failed / 5.0)
         )
+        hours_since_success = (now - success_times) / 3600.0
+        time_scores = np.where(
+            success_times > 0,
+            10.0 * np.maximum(0.0, 1.0 - hours_since_success / 24.0),
+            10.0
+        )
+        scores = np.where(requests > 0, np.clip(base_scores + time_scores, 0.0, 100.0), 0.0)
+
+        return (scores >= 60) & usable & ((now - check_times) < 3600)
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -215,7 +363,7 @@ class ProxyModel:
             "protocol": self.protocol,
             "success_rate": self.success_rate,
             "avg_response_time": self.avg_response_time,
-            "last_check_time": self.last_check_time.isoformat(),
+            "last_check_time": self.last_check_time,  # 时间字段直接输出 epoch 秒
             "consecutive_failed_times": self.consecutive_failed_times,
             "total_requests": self.total_requests,
             "location": self.location,
@@ -223,14 +371,13 @@ class ProxyModel:
             "last_status_code": self.last_status_code,
             "tags": self.tags,
             "status": self.status.value,
-            "created_time": self.created_time.isoformat(),
-            "last_success_time": self.last_success_time.isoformat() if self.last_success_time else None,  #
+            "created_time": self.created_time,
+            "last_success_time": self.last_success_time,
             "score": self.get_score(),  #
-            "response_times": self.response_times,
+            "response_times": list(self.response_times),
             "max_response_times": self.max_response_times,
+            "rt_m2": self.rt_m2,
         }
-        if self.last_success_time:
-            data['response_times'] = self.last_success_time.isoformat()
         return data
 
     def to_json(self) -> str:
@@ -240,15 +387,25 @@ class ProxyModel:
         Returns:
             str: 代理信息 JSON
         """
-        return json.dumps(self.to_dict(), ensure_ascii=False)
+        return self.to_json_bytes().decode()
+
+    def to_json_bytes(self) -> bytes:
+        """
+        序列化代理对象为 UTF-8 编码的 JSON, 可直接写入 Redis
+
+        Returns:
+            bytes: 代理信息 JSON
+        """
+        return _dumps_bytes(self.to_dict())
 
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> "ProxyModel":
+    def from_dict(cls, data: Dict[str, Any], trusted: bool = False) -> "ProxyModel":
         """
         从字典创建代理对象
 
         Args:
             data: 代理信息字典
+            trusted: 数据是否可信 (入库时已验证), 可信时跳过参数验证
 
         Returns:
             ProxyModel: 新的代理对象
@@ -256,37 +413,46 @@ class ProxyModel:
         # 创建数据副本，避免修改原始数据
         data = data.copy()
 
-        # 处理 datetime 字段
-        for datetime_field in ['last_check_time', 'created_time']:
-            if datetime_field in data and isinstance(data[datetime_field], str):
-                data[datetime_field] = datetime.fromisoformat(data[datetime_field])
-
-        if 'last_success_time' in data and data['last_success_time']:
-            data['last_success_time'] = datetime.fromisoformat(data['last_success_time'])
+        # 旧版本以 ISO 字符串存储时间字段, 仅在遇到旧数据时转换
+        if isinstance(data.get('last_check_time'), str):
+            cls._legacy_from_dict(data)
 
         # 移除不需要的字段
         for extra_field in ['score']:
             data.pop(extra_field, None)
 
         # 创建新实例
-        return cls(**data)
+        return cls(**data, skip_validation=trusted)
+
+    @staticmethod
+    def _legacy_from_dict(data: Dict[str, Any]) -> None:
+        """
+        兼容旧数据: 将字典中 ISO 字符串格式的时间字段原地转换为 epoch 秒
+
+        Args:
+            data: 代理信息字典
+        """
+        for time_field in ['last_check_time', 'created_time', 'last_success_time']:
+            if isinstance(data.get(time_field), str):
+                data[time_field] = datetime.fromisoformat(data[time_field]).timestamp()
 
     @classmethod
-    def from_json(cls, json_data: str) -> "ProxyModel":
+    def from_json(cls, json_data: str, trusted: bool = False) -> "ProxyModel":
         """
         从 JSON 创建代理对象
 
         Args:
-            json_data: 代理信息 JSON
+            json_data: 代理信息 JSON (str 或 bytes)
+            trusted: 数据是否可信, 可信时跳过参数验证
 
         Returns:
             ProxyModel: 新的代理对象
         """
-        return cls.from_dict(json.loads(json_data))
+        return cls.from_dict(_loads(json_data), trusted)
 
-    def __str__(self) -> str:
+    def status_line(self) -> str:
         """
-        代理模型字符串表示
+        代理详细状态描述, 包含有效性判断, 开销较大, 仅在需要时调用
 
         Returns:
             str: 代理信息的可读字符串
@@ -301,6 +467,57 @@ class ProxyModel:
             f"Requests: {self.total_requests})"
         )
 
+    def to_msgpack(self) -> bytes:
+        """
+        序列化代理对象为 msgpack
+
+        Returns:
+            bytes: 代理信息 msgpack 数据
+
+        Raises:
+            ImportError: 未安装 msgpack 时抛出
+        """
+        if msgpack is None:
+            raise ImportError("msgpack 未安装")
+        return msgpack.packb(self.to_dict(), use_bin_type=True)
+
+    @classmethod
+    def from_msgpack(cls, data: bytes, trusted: bool = False) -> "ProxyModel":
+        """
+        从 msgpack 创建代理对象
+
+        Args:
+            data: 代理信息 msgpack 数据
+            trusted: 数据是否可信, 可信时跳过参数验证
+
+        Returns:
+            ProxyModel: 新的代理对象
+
+        Raises:
+            ImportError: 未安装 msgpack 时抛出
+        """
+        if msgpack is None:
+            raise ImportError("msgpack 未安装")
+        return cls.from_dict(msgpack.unpackb(data, raw=False), trusted)
+
+    def __str__(self) -> str:
+        """
+        代理模型字符串表示, 日志插值频繁, 不做评分计算
+
+        Returns:
+            str: 代理信息的简要字符串
+        """
+        return f"Proxy({self.ip}:{self.port}, {self.protocol}, {self.success_rate:.2%})"
+
+    def __repr__(self) -> str:
+        """
+        代理模型调试表示
+
+        Returns:
+            str: 代理标识字符串
+        """
+        return f"ProxyModel(ip={self.ip!r}, port={self.port!r}, protocol={self.protocol!r})"
+
     def __eq__(self, other: object) -> bool:
         """
         判断两个代理模型是否相等
@@ -326,7 +543,7 @@ class ProxyModel:
         Returns:
             int: 代理模型的哈希值
         """
-        return hash((self.ip, self.port, self.protocol))
+        return self._hash
 
 
 if __name__ == '__main__':
@@ -347,7 +564,7 @@ if __name__ == '__main__':
         proxy.update_stats(True, 0.6, 200)
 
         print("\n=== 代理状态 ===")
-        print(f"Proxy: {proxy}")
+        print(proxy.status_line())
         print(f"Score: {proxy.get_score():.2f}")
         print(f"Status: {proxy.status.value}")
         print(f"Valid: {proxy.is_valid()}")
@@ -363,7 +580,7 @@ if __name__ == '__main__':
         # 测试反序列化
         new_proxy = ProxyModel.from_json(json_str)
         print("Deserialized proxy:")
-        print(new_proxy)
+        print(new_proxy.status_line())
 
         print("\n=== 对象比较 ===")
         print(f"Original proxy: {proxy}")
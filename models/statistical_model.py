@@ -11,10 +11,12 @@ Changed history:            实现基于统计的代理评估算法
 ----------------------------------------------------------------
 """
 
+import math
+import time
+from functools import lru_cache
+
 import numpy as np
-from scipy import stats
-from datetime import datetime
-from typing import List, Tuple, Dict, Sequence
+from typing import Callable, List, Optional, Tuple, Dict, Sequence
 from dataclasses import dataclass
 
 from proxy_pool.models.proxy_model import ProxyModel
@@ -22,7 +24,181 @@ from proxy_pool.utils.config import ProxyConfig
 from proxy_pool.utils.logger import setup_logger
 
 
-@dataclass
+# scipy 与 numba 导入开销大, 均推迟到首次计算时导入, 只用到 ProxyModel 的进程无需加载
+prange = range  # 编译内核时替换为 numba.prange
+
+
+@lru_cache(maxsize=None)
+def _t_crit_95() -> np.ndarray:
+    """
+    95% 置信水平下 t 分布双侧临界值表, 下标为自由度 - 1 (df = 1..199), 首次使用时计算
+
+    Returns:
+        临界值数组
+    """
+    from scipy import stats
+    return stats.t.ppf(0.975, np.arange(1, 200))
+
+
+@lru_cache(maxsize=256)
+def _t_critical(confidence_level: float, df: int) -> float:
+    """
+    t 分布双侧临界值, t 分布对称, 只需一次 PPF; 95% 置信水平直接查表, 其余结果缓存
+
+    Args:
+        confidence_level: 置信水平
+        df: 自由度
+
+    Returns:
+        临界值
+    """
+    if confidence_level == 0.95 and df <= 199:
+        return float(_t_crit_95()[df - 1])
+    from scipy import stats
+    return float(stats.t.ppf(0.5 + confidence_level / 2, df))
+
+
+def _reliability_kernel(response_times: np.ndarray, threshold: float) -> Tuple[float, float]:
+    """
+    计算响应时间的稳定性与非异常比例
+
+    单次遍历 (Welford) 求均值与总体标准差, 再遍历一次统计 Z 分数超过阈值的个数,
+    结果与 1 - np.std / np.mean 及 detect_anomalies 一致; 均值为 0 时稳定性记 0
+
+    Args:
+        response_times: 响应时间数组
+        threshold: Z分数阈值
+
+    Returns:
+        (稳定性, 非异常比例)
+    """
+    n = response_times.shape[0]
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        delta = response_times[i] - mean
+        mean += delta / (i + 1)
+        m2 += delta * (response_times[i] - mean)
+    std = math.sqrt(m2 / n)
+
+    anomalies = 0
+    if n >= 2 and std > 0.0:
+        for i in range(n):
+            anomalies += abs((response_times[i] - mean) / std) > threshold
+
+    stability = 1.0 - std / mean if mean != 0.0 else 0.0
+    return stability, 1.0 - anomalies / n
+
+
+def _score_kernel(
+        rates: np.ndarray,
+        avg_rts: np.ndarray,
+        failed: np.ndarray,
+        check_times: np.ndarray,
+        reliabilities: np.ndarray,
+        now: float,
+        min_score: int,
+        max_score: int,
+        out: np.ndarray
+) -> None:
+    """
+    单次遍历计算各评分项与总分, 写入 out 的 6 列 (总分, 成功率, 响应时间, 稳定性, 时效性, 可靠性)
+
+    各项计算与 calculate_detailed_score 一致, 仅在安装 numba 时编译使用
+
+    Args:
+        rates: 成功率数组
+        avg_rts: 平均响应时间数组
+        failed: 连续失败次数数组
+        check_times: 最后检查时间数组, 0 表示未检查
+        reliabilities: 可靠性评分数组
+        now: 当前时间 (epoch 秒)
+        min_score: 最低分
+        max_score: 最高分
+        out: (P, 6) 整型输出矩阵
+    """
+    for i in prange(rates.shape[0]):
+        success_rate_score = int(rates[i] * 40.0)
+        response_time_score = int(max(0.0, 25.0 - avg_rts[i] * 2.5))
+        stability_score = int(15.0 * (1.0 - min(failed[i] / 5.0, 1.0)))
+        recency_score = 0
+        if check_times[i] > 0.0:
+            hours_since_check = (now - check_times[i]) / 3600.0
+            recency_score = int(max(0.0, 10.0 * (1.0 - hours_since_check / 24.0)))
+        reliability_score = int(reliabilities[i] * 10.0)
+
+        total = (success_rate_score + response_time_score + stability_score
+                 + recency_score + reliability_score)
+        out[i, 0] = max(min_score, min(total, max_score))
+        out[i, 1] = success_rate_score
+        out[i, 2] = response_time_score
+        out[i, 3] = stability_score
+        out[i, 4] = recency_score
+        out[i, 5] = reliability_score
+
+
+@lru_cache(maxsize=None)
+def _kernels() -> Tuple[Callable, Optional[Callable]]:
+    """
+    首次调用时尝试用 numba 编译计算内核 (可选依赖)
+
+    Returns:
+        (可靠性内核, 评分内核), 未安装 numba 时为 (纯 Python 实现, None), 评分改用 numpy 向量化实现
+    """
+    global prange
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return _reliability_kernel, None
+    # 不开启 fastmath, 保证取整边界与逐个计算一致
+    return njit(cache=True)(_reliability_kernel), njit(parallel=True, cache=True)(_score_kernel)
+
+
+def _padded_matrix(series: Sequence[Sequence[float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    将长短不一的序列堆叠为 (P, W) 矩阵, 不足部分以 NaN 填充, 不影响统计量
+
+    Args:
+        series: 序列列表
+
+    Returns:
+        (填充后的矩阵, 各序列长度)
+    """
+    lengths = np.fromiter((len(row) for row in series), np.int64, len(series))
+    width = int(lengths.max()) if len(series) else 0
+    matrix = np.full((len(series), width), np.nan)
+    for i, row in enumerate(series):
+        matrix[i, :lengths[i]] = row
+    return matrix, lengths
+
+
+def _anomaly_matrix(
+        matrix: np.ndarray,
+        lengths: np.ndarray,
+        threshold: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    按行计算均值、总体标准差与 Z 分数异常标记, 填充位置恒为 False
+
+    Args:
+        matrix: NaN 填充的 (P, W) 矩阵
+        lengths: 各行有效长度
+        threshold: Z分数阈值
+
+    Returns:
+        (各行均值, 各行标准差, 异常标记矩阵)
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.nansum(matrix, axis=1) / lengths
+        deviation = matrix - mean[:, None]
+        std = np.sqrt(np.nansum(deviation * deviation, axis=1) / lengths)
+        flags = np.abs(deviation / std[:, None]) > threshold
+    # 少于两个样本或无波动时不判定异常, 与 detect_anomalies 一致
+    flags &= ((lengths >= 2) & (std > 0.0))[:, None]
+    return mean, std, flags
+
+
+@dataclass(slots=True)
 class ProxyScore:
     """ 代理评分详情 """
     total_score: int
@@ -63,15 +239,10 @@ class ProxyStatisticalModel:
             if len(rate_sequence) < 2:
                 return mean, mean
 
-            std_error = float(stats.sem(rate_sequence))
-            # confidence_interval
-            ci = stats.t.interval(
-                confidence_level,
-                len(rate_sequence) - 1,
-                loc=mean,
-                scale=std_error,
-            )
-            return max(0.0, ci[0]), min(1.0, ci[1])
+            n = len(rate_sequence)
+            std_error = float(np.std(rate_sequence, ddof=1)) / math.sqrt(n)
+            margin = _t_critical(confidence_level, n - 1) * std_error
+            return max(0.0, mean - margin), min(1.0, mean + margin)
 
         except Exception as e:
             self.logger.error(f"计算置信区间失败: {e}")
@@ -96,16 +267,84 @@ class ProxyStatisticalModel:
             return [False] * len(response_times)
 
         try:
-            z_scores = np.abs(stats.zscore(response_times))
-            return [z > threshold for z in z_scores]
+            times = np.asarray(response_times, dtype=np.float64)
+            std = times.std()
+            if std == 0:
+                return [False] * len(response_times)  # 无波动时不判定异常
+            z_scores = np.abs(times - times.mean()) * (1.0 / std)
+            return (z_scores > threshold).tolist()
         except Exception as e:
             self.logger.error(f"异常值检测失败: {str(e)}")
             return [False] * len(response_times)
 
+    def detect_anomalies_batch(
+            self,
+            series: Sequence[Sequence[float]],
+            threshold: float = 2.0
+    ) -> List[List[bool]]:
+        """
+        批量检测多组响应时间的异常值, 所有序列在同一矩阵上一次计算
+
+        Args:
+            series: 多组响应时间列表
+            threshold: Z分数阈值
+
+        Returns:
+            与每组响应时间一一对应的异常值标记列表
+        """
+        if not series:
+            return []
+
+        matrix, lengths = _padded_matrix(series)
+        _, _, flags = _anomaly_matrix(matrix, lengths, threshold)
+        return [row[:n].tolist() for row, n in zip(flags, lengths.tolist())]
+
+    def _reliability_batch(
+            self,
+            proxies: List[ProxyModel],
+            now: float,
+            window_size: int = 10
+    ) -> np.ndarray:
+        """
+        批量计算可靠性得分, 结果与逐个调用 calculate_reliability_score 一致
+
+        Args:
+            proxies: 代理模型列表
+            now: 当前时间 (epoch 秒)
+            window_size: 时间窗口大小
+
+        Returns:
+            可靠性得分数组 (0-1), 无响应时间记录的代理为 0
+        """
+        windows = [proxy.recent_response_times(window_size) for proxy in proxies]
+        matrix, lengths = _padded_matrix(windows)
+        mean, std, flags = _anomaly_matrix(matrix, lengths, 2.0)
+
+        success_times = np.fromiter(
+            (proxy.last_success_time or 0.0 for proxy in proxies), np.float64, len(proxies)
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # 稳定性与异常比例, 均值为 0 时稳定性记 0 (与 _reliability_kernel 一致)
+            stability = np.where(mean != 0.0, 1.0 - std / mean, 0.0)
+            anomaly_ratio = 1.0 - flags.sum(axis=1) / lengths
+
+            # 时间衰减, 24小时衰减
+            time_decay = np.where(
+                success_times > 0,
+                np.exp(-(now - success_times) / 3600 / 24),
+                0.0
+            )
+
+            reliability = stability * 0.4 + anomaly_ratio * 0.4 + time_decay * 0.2
+
+        # 无响应时间记录的代理记 0 分
+        return np.where(lengths > 0, reliability, 0.0)
+
     def calculate_reliability_score(
             self,
             proxy: ProxyModel,
-            window_size: int = 10
+            window_size: int = 10,
+            now: Optional[float] = None
     ) -> float:
         """
         计算代理可靠性得分
@@ -113,6 +352,7 @@ class ProxyStatisticalModel:
         Args:
             proxy: 代理模型
             window_size: 时间窗口大小
+            now: 当前时间 (epoch 秒), 默认取调用时刻
 
         Returns:
             可靠性得分 (0-1)
@@ -120,22 +360,20 @@ class ProxyStatisticalModel:
         if not proxy.response_times:
             return 0.0
 
-        recent_times = proxy.response_times[-window_size:]
+        recent_times = proxy.recent_response_times(window_size)
 
         try:
-            # 计算稳定性
-            stability = 1.0 - np.std(recent_times) / np.mean(recent_times)
-
-            # 计算异常比例
-            anomaly_flags = self.detect_anomalies(recent_times)
-            anomaly_ratio = 1.0 - sum(anomaly_flags) / len(anomaly_flags)
+            # 计算稳定性与异常比例
+            reliability_kernel, _ = _kernels()
+            stability, anomaly_ratio = reliability_kernel(
+                np.asarray(recent_times, dtype=np.float64), 2.0
+            )
 
             # 计算时间衰减
             time_decay = 0.0
             if proxy.last_success_time:
-                hours_since_success = (
-                                              datetime.now() - proxy.last_success_time
-                                      ).total_seconds() / 3600
+                now = time.time() if now is None else now
+                hours_since_success = (now - proxy.last_success_time) / 3600
                 time_decay = np.exp(-hours_since_success / 24)  # 24小时衰减
 
             return stability * 0.4 + anomaly_ratio * 0.4 + time_decay * 0.2
@@ -146,17 +384,20 @@ class ProxyStatisticalModel:
 
     def calculate_detailed_score(
             self,
-            proxy: ProxyModel
+            proxy: ProxyModel,
+            now: Optional[float] = None
     ) -> ProxyScore:
         """
         计算详细的代理评分
 
         Args:
             proxy: 代理模型
+            now: 当前时间 (epoch 秒), 批量评分时由调用方统一传入
 
         Returns:
             详细评分对象
         """
+        now = time.time() if now is None else now
         try:
             # 成功率得分 (40分)
             success_rate_score = int(proxy.success_rate * 40.0)
@@ -174,16 +415,14 @@ class ProxyStatisticalModel:
             # 时效性得分 (10分)
             recency_score = 0.0
             if proxy.last_check_time:
-                hours_since_check = (
-                                            datetime.now() - proxy.last_check_time
-                                    ).total_seconds() / 3600.0
+                hours_since_check = (now - proxy.last_check_time) / 3600.0
                 recency_score = int(
                     max(0.0, 10.0 * (1.0 - hours_since_check / 24.0))
                 )
 
             # 可靠性得分 (10分)
             reliability_score = int(
-                self.calculate_reliability_score(proxy) * 10.0
+                self.calculate_reliability_score(proxy, now=now) * 10.0
             )
 
             # 总分
@@ -214,6 +453,85 @@ class ProxyStatisticalModel:
             self.logger.error(f"计算详细评分失败: {str(e)}")
             return ProxyScore(0, 0, 0, 0, 0, 0)
 
+    def _score_batch(
+            self,
+            proxies: List[ProxyModel],
+            now: Optional[float] = None
+    ) -> List[ProxyScore]:
+        """
+        批量计算详细评分, 结果与逐个调用 calculate_detailed_score 一致
+
+        各评分项按字段组成数组后整体计算, 避免逐个代理的解释器开销
+
+        Args:
+            proxies: 代理模型列表
+            now: 当前时间 (epoch 秒), 默认取调用时刻
+
+        Returns:
+            与 proxies 一一对应的详细评分列表
+        """
+        count = len(proxies)
+        if not count:
+            return []
+        now = time.time() if now is None else now
+
+        rates = np.fromiter((p.success_rate for p in proxies), np.float64, count)
+        avg_rts = np.fromiter((p.avg_response_time for p in proxies), np.float64, count)
+        failed = np.fromiter((p.consecutive_failed_times for p in proxies), np.float64, count)
+        check_times = np.fromiter((p.last_check_time or 0.0 for p in proxies), np.float64, count)
+
+        reliabilities = self._reliability_batch(proxies, now)
+
+        _, score_kernel = _kernels()
+        if score_kernel is not None:
+            # 各评分项在一个编译后的循环内完成, 不产生中间数组
+            matrix = np.empty((count, 6), dtype=np.int64)
+            score_kernel(
+                rates, avg_rts, failed, check_times, reliabilities, now,
+                self.config.MIN_SCORE, self.config.MAX_SCORE, matrix
+            )
+            return [ProxyScore(*fields) for fields in matrix.tolist()]
+
+        # 成功率得分 (40分)
+        success_rate_scores = (rates * 40.0).astype(np.int64)
+
+        # 响应时间得分 (25分)
+        response_time_scores = np.maximum(0.0, 25.0 - avg_rts * 2.5).astype(np.int64)
+
+        # 稳定性得分 (15分)
+        stability_scores = (15.0 * (1.0 - np.minimum(failed / 5.0, 1.0))).astype(np.int64)
+
+        # 时效性得分 (10分), 无检查时间记 0 分
+        hours_since_check = (now - check_times) / 3600.0
+        recency_scores = np.where(
+            check_times > 0,
+            np.maximum(0.0, 10.0 * (1.0 - hours_since_check / 24.0)),
+            0.0
+        ).astype(np.int64)
+
+        # 可靠性得分 (10分)
+        reliability_scores = (reliabilities * 10.0).astype(np.int64)
+
+        # 总分, 确保在有效范围内
+        total_scores = np.clip(
+            success_rate_scores + response_time_scores + stability_scores
+            + recency_scores + reliability_scores,
+            self.config.MIN_SCORE,
+            self.config.MAX_SCORE
+        )
+
+        return [
+            ProxyScore(*fields)
+            for fields in zip(
+                total_scores.tolist(),
+                success_rate_scores.tolist(),
+                response_time_scores.tolist(),
+                stability_scores.tolist(),
+                recency_scores.tolist(),
+                reliability_scores.tolist(),
+            )
+        ]
+
     def evaluate_proxy_quality(
             self,
             proxy_models: List[ProxyModel]
@@ -227,15 +545,18 @@ class ProxyStatisticalModel:
         Returns:
             代理质量评估结果
         """
-        results = {}
-        for proxy in proxy_models:
-            try:
-                proxy_key = f"{proxy.ip}:{proxy.port}"
-                results[proxy_key] = self.calculate_detailed_score(proxy)
-            except Exception as e:
-                self.logger.error(f"评估代理质量失败 {proxy.ip}:{proxy.port}: {str(e)}")
+        now = time.time()  # 整批共用同一时间
+        proxy_keys = [f"{proxy.ip}:{proxy.port}" for proxy in proxy_models]
+        try:
+            return dict(zip(proxy_keys, self._score_batch(proxy_models, now)))
+        except Exception as e:
+            self.logger.error(f"批量评估代理质量失败, 改为逐个评估: {str(e)}")
 
-        return results
+        # calculate_detailed_score 内部已处理异常, 逐个评估无需再包 try
+        return dict(zip(
+            proxy_keys,
+            [self.calculate_detailed_score(proxy, now) for proxy in proxy_models]
+        ))
 
 
 if __name__ == "__main__":
@@ -267,3 +588,10 @@ if __name__ == "__main__":
     print(f"稳定性得分: {score.stability_score}")
     print(f"时效性得分: {score.recency_score}")
     print(f"可靠性得分: {score.reliability_score}")
+
+    # 回归检查: 响应时间均值为 0 时批量评分与逐个评分一致
+    zero_proxy = ProxyModel(ip="220.248.70.238", port=9002, response_times=[0.0, 0.0, 0.0])
+    zero_proxy.last_success_time = zero_proxy.last_check_time = time.time()
+    batch_scores = model._score_batch([zero_proxy, test_proxy])
+    assert batch_scores == [model.calculate_detailed_score(p) for p in (zero_proxy, test_proxy)], batch_scores
+    print(f"均值为 0 的代理评分: {batch_scores[0]}")
@@ -1,13 +1,15 @@
 import aiohttp
 from lxml import etree
 import asyncio
-from charset_normalizer import from_bytes
 import re
 
 
+# 模块加载时编译一次
+_PROXY_RE = re.compile(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}:\d{1,5}$')
+
+
 def is_valid_proxy(proxy):
-    match = re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}:\d{1,5}$', proxy)
-    return bool(match)
+    return _PROXY_RE.match(proxy) is not None
 
 
 async def fetch_proxies_jhao(url):
@@ -19,12 +21,9 @@ async def fetch_proxies_jhao(url):
         try:
             async with session.get(url, headers=headers, timeout=10) as response:
                 if response.status == 200:
-                    # 读取二进制内容
+                    # 读取二进制内容, 直接交给 lxml 解析, IP 与端口均为 ASCII, 无需先检测编码再整页解码
                     content = await response.read()
-                    # 使用 charset-normalizer 检测编码
-                    result = from_bytes(content).best()
-                    html_text = str(result)
-                    html = etree.HTML(html_text)
+                    html = etree.HTML(content)
                     proxies = []
                     for row in html.xpath('//table//tr'):
                         try:
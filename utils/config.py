@@ -13,21 +13,50 @@ Changed history:            初始化配置文件,定义系统全局配置
 
 import os
 from pydantic_settings import BaseSettings
-from dataclasses import dataclass, field, asdict
-from typing import Optional, Dict, List
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, ClassVar, Optional, Dict, List, TextIO, Tuple
 from pathlib import Path
 import json
-import yaml
+from functools import lru_cache
+
+try:
+    import orjson  # 可选依赖, 序列化更快
+except ImportError:
+    orjson = None
 
 from proxy_pool.utils.exceptions import ConfigError
 from proxy_pool.utils.logger import setup_logger
 
 
+@lru_cache(maxsize=None)
+def _yaml() -> Tuple[Any, type, type]:
+    """
+    首次读写 YAML 配置时才导入 PyYAML, 不使用 YAML 配置的进程无需加载
+
+    Returns:
+        (yaml 模块, Loader, Dumper), 优先使用 libyaml C 实现, 解析与输出远快于纯 Python 实现
+    """
+    import yaml
+    try:
+        from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+    except ImportError:
+        from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+    return yaml, YamlLoader, YamlDumper
+
+
+def _dumps_indented(data: Dict) -> str:
+    """ 以 2 空格缩进序列化为 JSON 字符串, 保留非 ASCII 字符 """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
 class Settings(BaseSettings):
     """ 应用配置 """
     # Redis配置
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_KEY_PREFIX: str = "proxy:"
+    REDIS_POOL_SIZE: int = 50
 
     # 代理池配置
     FETCH_INTERVAL: int = 300
@@ -57,6 +86,38 @@ settings = Settings()
 logger = setup_logger()
 
 
+# 环境变量 -> (配置项, 类型转换) 映射表, 模块加载时确定
+_ENV_MAPPING: Tuple[Tuple[str, str, Callable[[str], Any]], ...] = (
+    ("PROXY_POOL_REDIS_HOST", "REDIS_HOST", str),
+    ("PROXY_POOL_REDIS_PORT", "REDIS_PORT", int),
+    ("PROXY_POOL_REDIS_PASSWORD", "REDIS_PASSWORD", str),
+    ("PROXY_POOL_REDIS_DB", "REDIS_DB", int),
+    ("PROXY_POOL_VALIDATE_TIMEOUT", "VALIDATE_TIMEOUT", int),
+    ("PROXY_POOL_FETCH_INTERVAL", "FETCH_INTERVAL", int),
+)
+
+# 进程内环境变量快照, 仅包含 PROXY_POOL_ 前缀的变量, 显式刷新前复用
+_env_cache: Optional[Dict[str, str]] = None
+
+
+def _env_snapshot(refresh: bool = False) -> Dict[str, str]:
+    """
+    获取环境变量快照, 首次调用或要求刷新时重新读取
+
+    Args:
+        refresh: 是否重新读取环境变量
+
+    Returns:
+        环境变量字典
+    """
+    global _env_cache
+    if _env_cache is None or refresh:
+        _env_cache = {
+            key: value for key, value in os.environ.items() if key.startswith("PROXY_POOL_")
+        }
+    return _env_cache
+
+
 @dataclass
 class ProxyConfig:
     """
@@ -76,6 +137,7 @@ class ProxyConfig:
         MIN_SCORE: 最低分数
         MAX_SCORE: 最高分数
         SCORE_STEP: 分数步长
+        VALID_SCORE: 有效代理最低分数
 
     统计配置:
         CONFIDENCE_LEVEL: 置信水平
@@ -88,12 +150,14 @@ class ProxyConfig:
         TEST_URLS: 测试URL列表
         VALIDATE_BATCH_SIZE: 验证批次大小
         VALIDATE_INTERVAL: 验证间隔
+        VALIDATE_CONCURRENCY: 验证并发数
 
     获取配置:
         FETCH_INTERVAL: 获取间隔
         FETCH_TIMEOUT: 获取超时时间
         FETCH_BATCH_SIZE: 获取批次大小
         MAX_FETCHERS: 最大获取器数量
+        verify_proxy: 获取后是否立即验证
     """
 
     # Redis配置参数
@@ -108,6 +172,7 @@ class ProxyConfig:
     MIN_SCORE: int = field(default=0)
     MAX_SCORE: int = field(default=100)
     SCORE_STEP: int = field(default=1)
+    VALID_SCORE: int = field(default=60)  # 低于该分数的代理不对外提供, 清理时移除
 
     # 统计配置
     CONFIDENCE_LEVEL: float = field(default=0.95)
@@ -120,42 +185,33 @@ class ProxyConfig:
     TEST_URLS: List[str] = field(default_factory=lambda: ["http://www.baidu.com"])
     VALIDATE_BATCH_SIZE: int = field(default=100)
     VALIDATE_INTERVAL: int = field(default=300)  # 300s 检验频次
+    VALIDATE_CONCURRENCY: int = field(default=200)  # 同时验证的代理数
 
     # 代理获取配置
     FETCH_INTERVAL: int = field(default=300)  # 300s 获取频次
     FETCH_TIMEOUT: int = field(default=10)
     FETCH_BATCH_SIZE: int = field(default=20)
     MAX_FETCHERS: int = field(default=5)
+    verify_proxy: bool = field(default=True)  # 获取后是否立即验证
 
-    def __init__(self):
-        self.verify_proxy = True
+    # 全部配置项名称, 类定义后计算一次, 避免每次调用 fields() 反射
+    _FIELD_NAMES: ClassVar[Tuple[str, ...]] = ()
 
     def __post_init__(self):
         """初始化后验证和环境变量处理"""
+        self._dict_cache: Optional[Tuple[int, Dict]] = None  # (版本号, 字典)
+        self._str_cache: Optional[Tuple[int, str]] = None  # (版本号, 字符串)
         self._load_from_env()
         self._validate_config()
 
     def _load_from_env(self):
         """从环境变量加载配置"""
-        env_mapping = {
-            "PROXY_POOL_REDIS_HOST": "REDIS_HOST",
-            "PROXY_POOL_REDIS_PORT": ("REDIS_PORT", int),
-            "PROXY_POOL_REDIS_PASSWORD": "REDIS_PASSWORD",
-            "PROXY_POOL_REDIS_DB": ("REDIS_DB", int),
-            "PROXY_POOL_VALIDATE_TIMEOUT": ("VALIDATE_TIMEOUT", int),
-            "PROXY_POOL_FETCH_INTERVAL": ("FETCH_INTERVAL", int),
-        }
-
-        for env_key, config_info in env_mapping.items():
-            if isinstance(config_info, tuple):
-                config_key, convert_func = config_info
-            else:
-                config_key, convert_func = config_info, str
-
-            if env_value := os.getenv(env_key):
+        env = _env_snapshot()
+        for env_key, config_key, convert_func in _ENV_MAPPING:
+            if env_value := env.get(env_key):
                 try:
                     setattr(self, config_key, convert_func(env_value))
-                    logger.debug(f"从环境变量加载配置: {env_key}={env_value}")
+                    logger.debug("从环境变量加载配置: %s=%s", env_key, env_value)
                 except ValueError as e:
                     logger.warning(
                         f"环境变量转换失败: {env_key}={env_value}, error: {e}"
@@ -166,6 +222,8 @@ class ProxyConfig:
         validations = [
             (0 <= self.MIN_SCORE <= self.INITIAL_SCORE <= self.MAX_SCORE,
              "评分配置无效: MIN_SCORE <= INITIAL_SCORE <= MAX_SCORE"),
+            (self.MIN_SCORE <= self.VALID_SCORE <= self.MAX_SCORE,
+             "评分配置无效: MIN_SCORE <= VALID_SCORE <= MAX_SCORE"),
             (0 < self.CONFIDENCE_LEVEL < 1,
              "置信水平必须在0到1之间"),
             (self.SAMPLE_SIZE >= self.MIN_SAMPLE_SIZE,
@@ -174,6 +232,8 @@ class ProxyConfig:
              "测试URL列表不能为空"),
             (self.VALIDATE_TIMEOUT > 0,
              "验证超时时间必须大于0"),
+            (self.VALIDATE_CONCURRENCY > 0,
+             "验证并发数必须大于0"),
             (self.MAX_RETRY_TIMES > 0,
              "最大重试次数必须大于0"),
             (self.FETCH_INTERVAL > 0,
@@ -192,29 +252,50 @@ class ProxyConfig:
         try:
             with open(path, "w", encoding="utf-8") as f:
                 if path.suffix in [".yaml", ".yml"]:
-                    yaml.dump(self.to_dict(), f, allow_unicode=True)
+                    yaml, _, yaml_dumper = _yaml()
+                    yaml.dump(self.to_dict(), f, allow_unicode=True, Dumper=yaml_dumper)
                 elif path.suffix == ".json":
-                    json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+                    self._stream_json(f)
                 else:
                     raise ConfigError(f"不支持の配置文件格式: {path.suffix}")
             logger.info(f"配置已导出至: {file_path}")
         except Exception as e:
             raise ConfigError(f"导出配置文件失败: {str(e)}")
 
+    def _stream_json(self, writer: TextIO):
+        """
+        逐个配置项写出 JSON 对象, 不构造中间字典
+
+        Args:
+            writer: 可写文本文件对象
+        """
+        writer.write("{")
+        separator = "\n"
+        for name in self._FIELD_NAMES:
+            writer.write(separator)
+            writer.write(f'  "{name}": ')
+            writer.write(json.dumps(getattr(self, name), ensure_ascii=False))
+            separator = ",\n"
+        writer.write("\n}\n")
+
     def load_from_file(self, config_path: str):
         """从配置文件加载配置"""
         try:
             path = Path(config_path)
-            if not path.exists():
-                raise ConfigError(f"配置文件不存在: {config_path}")
+            if path.suffix not in (".yaml", ".yml", ".json"):
+                raise ConfigError(f"不支持的配置文件格式: {path.suffix}")
 
-            with open(path, "r", encoding="utf-8") as f:
-                if path.suffix in [".yaml", ".yml"]:
-                    config_data = yaml.safe_load(f)
-                elif path.suffix == ".json":
+            # 解析器直接从文件对象流式读取, 不存在时由 open 报错, 省去额外的 exists 检查
+            try:
+                f = open(path, "r", encoding="utf-8")
+            except FileNotFoundError:
+                raise ConfigError(f"配置文件不存在: {config_path}")
+            with f:
+                if path.suffix == ".json":
                     config_data = json.load(f)
                 else:
-                    raise ConfigError(f"不支持的配置文件格式: {path.suffix}")
+                    yaml, yaml_loader, _ = _yaml()
+                    config_data = yaml.load(f, Loader=yaml_loader)
 
             # 更新配置
             for key, value in config_data.items():
@@ -227,33 +308,88 @@ class ProxyConfig:
         except Exception as e:
             raise ConfigError(f"加载配置文件失败: {str(e)}")
 
-    def reload(self):
-        """ 重新加载配置 """
+    def reload(self, refresh_env: bool = False):
+        """
+        重新加载配置
+
+        Args:
+            refresh_env: 是否重新读取环境变量, 默认复用进程内快照
+        """
+        if refresh_env:
+            _env_snapshot(refresh=True)
         self._load_from_env()
         self._validate_config()
         logger.info("配置已重新加载")
 
+    def __setattr__(self, name, value):
+        """ 修改配置项时递增版本号, 使 to_dict 与 __str__ 的缓存失效 """
+        object.__setattr__(self, name, value)
+        if not name.startswith("_"):
+            object.__setattr__(self, "_version", getattr(self, "_version", 0) + 1)
+
     def to_dict(self) -> Dict[str, str]:
-        """ 转换为字典 """
-        return asdict(self)
+        """
+        转换为字典, 配置未变化时复用上次结果, 避免重复遍历配置项
+
+        原地修改列表类配置项 (如 TEST_URLS.append) 不会使缓存失效, 应整体赋值
+        """
+        cache = self._dict_cache
+        if cache is None or cache[0] != self._version:
+            config_dict = {}
+            for name in self._FIELD_NAMES:
+                value = getattr(self, name)
+                # 配置项均为基本类型或字符串列表, 只需复制列表
+                config_dict[name] = list(value) if isinstance(value, list) else value
+            cache = self._dict_cache = (self._version, config_dict)
+        # 返回时再复制列表, 调用方修改结果不会影响缓存
+        return {
+            name: list(value) if isinstance(value, list) else value
+            for name, value in cache[1].items()
+        }
 
     def __str__(self) -> str:
         """ 字符串梅花 """
-        config_dict = self.to_dict()
-        grouped_config = {
-            "Redis配置": {
-                k: v for k, v in config_dict.items() if k.startswith("REDIS_")
-            },
-            "评分配置": {k: v for k, v in config_dict.items() if "SCORE" in k},
-            "统计配置": {
-                k: v
-                for k, v in config_dict.items()
-                if k in ["CONFIDENCE_LEVEL", "SAMPLE_SIZE", "MIN_SAMPLE_SIZE"]
-            },
-            "验证配置": {k: v for k, v in config_dict.items() if "VALIDATE" in k},
-            "获取配置": {k: v for k, v in config_dict.items() if "FETCH" in k},
-        }
-        return json.dumps(grouped_config, indent=2, ensure_ascii=False)
+        cache = self._str_cache
+        if cache is not None and cache[0] == self._version:
+            return cache[1]
+
+        grouped_config = {group: {} for group in _CONFIG_GROUPS}
+        for k, v in self.to_dict().items():
+            group = _GROUP_OF.get(k)
+            if group is not None:
+                grouped_config[group][k] = v
+        text = _dumps_indented(grouped_config)
+        self._str_cache = (self._version, text)
+        return text
+
+
+ProxyConfig._FIELD_NAMES = tuple(config_field.name for config_field in fields(ProxyConfig))
+
+
+# 配置分组 (用于 __str__ 展示), 按配置项名称判断, 未匹配的配置项不展示
+_GROUP_RULES: Tuple[Tuple[str, Callable[[str], bool]], ...] = (
+    ("Redis配置", lambda k: k.startswith("REDIS_")),
+    ("评分配置", lambda k: "SCORE" in k),
+    ("统计配置", lambda k: k in ("CONFIDENCE_LEVEL", "SAMPLE_SIZE", "MIN_SAMPLE_SIZE")),
+    ("验证配置", lambda k: "VALIDATE" in k),
+    ("获取配置", lambda k: "FETCH" in k),
+)
+_CONFIG_GROUPS: Tuple[str, ...] = tuple(group for group, _ in _GROUP_RULES)
+
+
+def _build_group_index() -> Dict[str, str]:
+    """ 对全部配置字段计算一次所属分组 """
+    group_of = {}
+    for name in ProxyConfig._FIELD_NAMES:
+        for group, matches in _GROUP_RULES:
+            if matches(name):
+                group_of[name] = group
+                break
+    return group_of
+
+
+# 配置项 -> 分组
+_GROUP_OF: Dict[str, str] = _build_group_index()
 
 
 _config_instance: Optional[ProxyConfig] = None
@@ -282,14 +418,15 @@ if __name__ == "__main__":
         config.export_config(export_path)
         print(f"\n配置已导出到 {export_path}")
         print("\n导出的配置文件内容:")
-        with open(export_path, 'r', encoding='utf-8') as f:
-            print(f.read())
+        yaml, _, yaml_dumper = _yaml()
+        print(yaml.dump(config.to_dict(), allow_unicode=True, Dumper=yaml_dumper))  # 与导出内容一致, 无需重新读取文件
 
         # 测试环境变量
         print("\n环境变量测试:")
         os.environ["PROXY_POOL_REDIS_HOST"] = "127.0.0.1"
         os.environ["PROXY_POOL_REDIS_PORT"] = "6380"
         new_config = ProxyConfig()
+        new_config.reload(refresh_env=True)  # 环境变量已变化, 刷新快照
         print("\n加载环境变量后的配置:")
         print(f"Redis Host: {new_config.REDIS_HOST}")
         print(f"Redis Port: {new_config.REDIS_PORT}")
@@ -48,7 +48,11 @@ class ErrorCode(Enum):
     CONFIG_FILE_ERROR = 6001
 
     def __str__(self):
-        return f"{self.name}({self.value})"
+        return _ERROR_CODE_STR[self]
+
+
+# 错误码字符串表示, 模块加载时生成一次
+_ERROR_CODE_STR: Dict[ErrorCode, str] = {code: f"{code.name}({code.value})" for code in ErrorCode}
 
 
 class ProxyPoolError(Exception):
@@ -71,19 +75,22 @@ class ProxyPoolError(Exception):
         self.code = code
         self.message = message
         self.details = details or {}
+        self._dict: Optional[Dict[str, Any]] = None  # to_dict 结果缓存
         super().__init__(self.message)
 
     def __str__(self):
         return f"{self.code}: {self.message}"
 
     def to_dict(self) -> Dict[str, Any]:
-        """ 转化为字典格式 """
-        return {
-            "code": self.code.value,
-            "error": self.code.name,
-            "message": self.message,
-            "details": self.details,
-        }
+        """ 转化为字典格式, 首次调用时构造, 之后返回同一字典 (调用方不应修改) """
+        if self._dict is None:
+            self._dict = {
+                "code": self.code.value,
+                "error": self.code.name,
+                "message": self.message,
+                "details": self.details,
+            }
+        return self._dict
 
 
 class ConfigError(ProxyPoolError):
@@ -179,9 +186,23 @@ class RedisError(ProxyPoolError):
         )
 
 
-class RequestError(Exception):
-    """ 请求异常基类 """
-    pass
+class RequestError(ProxyPoolError):
+    """
+    请求异常基类
+
+    HTTP 请求失败时抛出
+    """
+    def __init__(
+        self,
+        message: str,
+        details: Optional[Dict[str, Any]] = None,
+        code: ErrorCode = ErrorCode.NETWORK_ERROR,
+    ):
+        super().__init__(
+            code=code,
+            message=message,
+            details=details,
+        )
 
 
 class ProxyError(RequestError):
@@ -189,6 +210,11 @@ class ProxyError(RequestError):
     pass
 
 
+# 非代理池异常统一使用的系统错误码, 避免每次访问枚举属性
+_SYSTEM_ERROR_VALUE = ErrorCode.SYSTEM_ERROR.value
+_SYSTEM_ERROR_NAME = ErrorCode.SYSTEM_ERROR.name
+
+
 def handle_exception(e: Exception) -> Dict[str, Any]:
     """
     统一异常处理
@@ -203,8 +229,8 @@ def handle_exception(e: Exception) -> Dict[str, Any]:
         return e.to_dict()
     else:
         return {
-            "code": ErrorCode.SYSTEM_ERROR.value,
-            "error": ErrorCode.SYSTEM_ERROR.name,
+            "code": _SYSTEM_ERROR_VALUE,
+            "error": _SYSTEM_ERROR_NAME,
             "message": str(e),
             "details": {"type": e.__class__.__name__},
         }
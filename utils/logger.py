@@ -11,13 +11,21 @@ Changed history:            初始化日志配置,提供统一日志接口
 ----------------------------------------------------------------
 """
 
+import atexit
 import logging
+import queue
 import sys
 import json
-from logging.handlers import RotatingFileHandler
-from typing import Optional, Dict, Any
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
 from pathlib import Path
-from datetime import datetime
+
+try:
+    import orjson  # 可选依赖, 序列化更快, 默认不转义非 ASCII 字符
+except ImportError:
+    orjson = None
 
 
 class LogConfigError(Exception):
@@ -27,19 +35,81 @@ class LogConfigError(Exception):
 
 class JsonFormatter(logging.Formatter):
     """ 自定义 Json 格式化器 """
+    def __init__(self, iso_time: bool = True):
+        """
+        Args:
+            iso_time: 时间戳是否输出为 ISO 字符串, 否则直接输出 epoch 秒, 省去时间格式化
+        """
+        super().__init__()
+        self.iso_time = iso_time
+
     def format(self, record: logging.LogRecord) -> str:
         """ Json 格式化日志记录 """
+        if orjson is not None:
+            return orjson.dumps(self._log_data(record)).decode()
+        return json.dumps(self._log_data(record), ensure_ascii=False)
+
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        """ Json 格式化日志记录, 直接返回 UTF-8 字节, 供二进制文件处理器写入 """
+        if orjson is not None:
+            return orjson.dumps(self._log_data(record))
+        return json.dumps(self._log_data(record), ensure_ascii=False).encode("utf-8")
+
+    def _log_data(self, record: logging.LogRecord) -> dict:
+        """ 构造日志记录字典 """
+        created = record.created
+        if self.iso_time:
+            # 直接拼接 ISO 格式时间, 不构造 datetime 对象
+            timestamp = (
+                f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(created))}"
+                f".{int((created % 1) * 1e6):06d}"
+            )
+        else:
+            timestamp = created
         log_data = {
-            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+            "timestamp": timestamp,
             "level": record.levelname,
-            "message": record.getMessage(),
+            # 无格式化参数时直接使用原始消息, 省去 getMessage 的格式化
+            "message": record.getMessage() if record.args else str(record.msg),
             "module": record.module,
             "function": record.funcName,
             "line": record.lineno
         }
         if hasattr(record, "extra"):
             log_data.update(record.extra)
-        return json.dumps(log_data, ensure_ascii=False)
+        return log_data
+
+
+class BinaryJsonFileHandler(RotatingFileHandler):
+    """
+    以二进制模式写入 JSON 日志的轮转文件处理器
+
+    JsonFormatter 直接输出 UTF-8 字节, 写入时不再经过文本层编码
+    """
+    def __init__(self, filename, max_bytes: int = 0, backup_count: int = 0):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        # RotatingFileHandler 会强制文本追加模式, 延迟打开前改为二进制追加
+        self.mode = "ab"
+        self.encoding = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """ 写入一条日志, 超出大小时先轮转 """
+        try:
+            data = self.formatter.format_bytes(record) + b"\n"
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0:
+                self.stream.seek(0, 2)
+                if self.stream.tell() + len(data) >= self.maxBytes:
+                    self.doRollover()
+                    if self.stream is None:
+                        self.stream = self._open()
+            self.stream.write(data)
+            self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
 
 
 class ProxyPoolLogger:
@@ -81,6 +151,9 @@ class ProxyPoolLogger:
         )
         self.SIMPLE_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
 
+        self._file_handlers = []
+        self._listener: Optional[QueueListener] = None
+
         try:
             self.logger = logging.getLogger(name)
             self.logger.setLevel(getattr(logging, level.upper()))
@@ -95,13 +168,9 @@ class ProxyPoolLogger:
                 self.log_dir = Path(log_dir)
                 self.log_dir.mkdir(parents=True, exist_ok=True)
 
-                # 清理之前的日志文件
-                log_file = self.log_dir / "proxy_pool.log"
-                error_file = self.log_dir / "error.log"
-                if log_file.exists():
-                    log_file.unlink()
-                if error_file.exists():
-                    error_file.unlink()
+                # 清理之前的日志文件, 不存在时忽略, 省去额外的 stat 调用
+                (self.log_dir / "proxy_pool.log").unlink(missing_ok=True)
+                (self.log_dir / "error.log").unlink(missing_ok=True)
 
                 # 常规日志文件处理器
                 self._add_file_handler(
@@ -119,10 +188,28 @@ class ProxyPoolLogger:
                     backup_count=backup_count,
                 )
 
+                # 文件写入交给后台线程, 调用方只需入队, 不在磁盘 I/O 上互相阻塞
+                log_queue = queue.SimpleQueue()
+                self.logger.addHandler(QueueHandler(log_queue))
+                self._listener = QueueListener(
+                    log_queue, *self._file_handlers, respect_handler_level=True
+                )
+                self._listener.start()
+                atexit.register(self.close)  # 退出前写完队列中剩余的日志
+
             # 控制台处理器
             if console:
                 self._add_console_handler()
 
+            # 日志方法直接绑定标准库 Logger, 调用时不经过包装层,
+            # 级别判断与延迟格式化由标准库完成, 记录的文件名/函数名也指向真实调用方
+            self.debug = self.logger.debug
+            self.info = self.logger.info
+            self.warning = self.logger.warning
+            self.error = self.logger.error
+            self.critical = self.logger.critical
+            self.exception = self.logger.exception
+
         except Exception as e:
             raise LogConfigError(f"日志系统初始化嘎了: {e}")
 
@@ -141,15 +228,22 @@ class ProxyPoolLogger:
         backup_count: int = 5,
     ) -> None:
         """ 添加文件处理器 """
-        file_handler = RotatingFileHandler(
-            self.log_dir / filename,
-            maxBytes=max_bytes,
-            backupCount=backup_count,
-            encoding="utf-8",
-        )
+        if self.json_format:
+            file_handler = BinaryJsonFileHandler(
+                self.log_dir / filename,
+                max_bytes=max_bytes,
+                backup_count=backup_count,
+            )
+        else:
+            file_handler = RotatingFileHandler(
+                self.log_dir / filename,
+                maxBytes=max_bytes,
+                backupCount=backup_count,
+                encoding="utf-8",
+            )
         file_handler.setLevel(level)
         file_handler.setFormatter(self._get_formatter())
-        self.logger.addHandler(file_handler)
+        self._file_handlers.append(file_handler)  # 由 QueueListener 在后台线程中调用
 
     def _add_console_handler(self) -> None:
         """ 添加控制台处理器 """
@@ -158,41 +252,17 @@ class ProxyPoolLogger:
         console_handler.setFormatter(self._get_formatter())
         self.logger.addHandler(console_handler)
 
-    def _log(
-            self,
-            level: int,
-            msg: str,
-            extra: Optional[Dict[str, Any]] = None,
-            *args,
-            **kwargs
-    ) -> None:
-        """统一的日志记录方法"""
-        if extra:
-            kwargs['extra'] = extra
-        self.logger.log(level, msg, *args, **kwargs)
-
-    def debug(self, msg: str, extra: Optional[Dict[str, Any]] = None, *args, **kwargs) -> None:
-        """记录调试日志"""
-        self._log(logging.DEBUG, msg, extra, *args, **kwargs)
-
-    def info(self, msg: str, extra: Optional[Dict[str, Any]] = None, *args, **kwargs) -> None:
-        """记录信息日志"""
-        self._log(logging.INFO, msg, extra, *args, **kwargs)
-
-    def warning(self, msg: str, extra: Optional[Dict[str, Any]] = None, *args, **kwargs) -> None:
-        """记录警告日志"""
-        self._log(logging.WARNING, msg, extra, *args, **kwargs)
-
-    def error(self, msg: str, extra: Optional[Dict[str, Any]] = None, *args, **kwargs) -> None:
-        """记录错误日志"""
-        self._log(logging.ERROR, msg, extra, *args, **kwargs)
-
-    def critical(self, msg: str, extra: Optional[Dict[str, Any]] = None, *args, **kwargs) -> None:
-        """记录严重错误日志"""
-        self._log(logging.CRITICAL, msg, extra, *args, **kwargs)
+    def close(self) -> None:
+        """ 停止后台写入线程 (写完队列中剩余日志) 并关闭文件处理器 """
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        for handler in self._file_handlers:
+            handler.close()
 
 
 _logger_instance = None
+_logger_lock = threading.Lock()
 
 
 def setup_logger(
@@ -214,8 +284,11 @@ def setup_logger(
         日志管理器实例
     """
     global _logger_instance
+    # 双重检查: 已创建时无锁直接返回, 首次创建加锁, 避免并发初始化重复添加处理器
     if _logger_instance is None:
-        _logger_instance = ProxyPoolLogger(name, level, log_dir, **kwargs)
+        with _logger_lock:
+            if _logger_instance is None:
+                _logger_instance = ProxyPoolLogger(name, level, log_dir, **kwargs)
     return _logger_instance
 
 
@@ -248,6 +321,9 @@ if __name__ == "__main__":
         logger.error("这是一条错误日志 [ERROR]", extra={"error_code": 500})
         logger.critical("这是一条严重错误日志 [CRITICAL]")
 
+        # 文件写入在后台线程完成, 关闭后队列中的日志才全部落盘
+        logger.close()
+
         print("\n当前日志文件内容:")
         log_file = Path("logs/proxy_pool.log")
         if log_file.exists():
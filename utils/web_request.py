@@ -12,14 +12,204 @@ Changed history:            网络请求模块: 代理源
 ----------------------------------------------------------------
 """
 
+import asyncio
+import os
+import random
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import aiohttp
-# import asyncio
-from aiohttp import ClientTimeout, TCPConnector, ClientSession
+from aiohttp import ClientTimeout, TCPConnector, ClientSession, hdrs
 from lxml import etree
-from typing import Optional, Any, Union, Callable
+from lxml.etree import HTMLParser, fromstring
+from multidict import CIMultiDict, CIMultiDictProxy
+from collections import OrderedDict
+from typing import Optional, Any, Union, Callable, List, Tuple
 from proxy_pool.utils.logger import setup_logger
 from proxy_pool.utils.exceptions import RequestError
 
+try:
+    import orjson as json_backend  # 可选依赖, 解析更快且直接接受 bytes
+except ImportError:
+    import json as json_backend
+
+try:
+    import aiodns  # noqa: F401  AsyncResolver 依赖, 基于 c-ares 在事件循环内解析 DNS
+    _HAS_AIODNS = True
+except ImportError:
+    _HAS_AIODNS = False
+
+
+# 设置 PROXY_POOL_UVLOOP=1 时导入即切换到 uvloop 事件循环, 未安装时保持默认
+if os.environ.get("PROXY_POOL_UVLOOP") == "1":
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
+
+# 进程内所有 WebRequest 共享的连接器, 跨实例复用 keep-alive 连接和 DNS 缓存
+_SHARED_CONNECTOR: Optional[TCPConnector] = None
+
+
+def _get_shared_connector() -> TCPConnector:
+    """
+    获取 / 创建共享连接器, 已关闭或绑定的事件循环已变化时重建
+
+    Returns:
+        TCPConnector: 共享连接器
+    """
+    global _SHARED_CONNECTOR
+    connector = _SHARED_CONNECTOR
+    if (
+        connector is None
+        or connector.closed
+        or getattr(connector, "_loop", None) is not asyncio.get_running_loop()
+    ):
+        connector = _SHARED_CONNECTOR = TCPConnector(
+            # 安装 aiodns 时用 c-ares 异步解析, 否则沿用线程池 getaddrinfo
+            resolver=aiohttp.AsyncResolver() if _HAS_AIODNS else None,
+            family=socket.AF_INET,  # 代理与代理源均为 IPv4, 跳过 AAAA 查询
+            use_dns_cache=True,
+            ssl=False,  # 关闭 SSL/TLS 验证
+            force_close=False,  # 保持连接复用
+            limit=200,  # 并发连接池大小
+            limit_per_host=32,  # 单主机并发连接数
+            ttl_dns_cache=300,  # DNS 缓存时间
+            enable_cleanup_closed=True,  # 清理异常关闭的 SSL 连接
+            keepalive_timeout=75,  # 空闲连接保持时间
+        )
+    return connector
+
+
+_MISSING = object()
+
+
+@lru_cache(maxsize=256)
+def _compile_xpath(expr: str) -> etree.XPath:
+    """ 编译 xpath 表达式并缓存, 相同表达式只编译一次 """
+    return etree.XPath(expr)
+
+
+_XP_TITLE = _compile_xpath("//title/text()")
+
+
+@lru_cache(maxsize=32)
+def _mk_timeout(total: float) -> ClientTimeout:
+    """
+    按总超时构造 ClientTimeout 并缓存, 相同超时的请求复用同一对象
+
+    Args:
+        total: 总超时时间(秒)
+
+    Returns:
+        ClientTimeout: aiohttp 超时配置对象
+    """
+    return ClientTimeout(
+        total=total,
+        connect=min(total * 0.2, 5),  # 连接超时
+        sock_connect=min(total * 0.2, 5),  # Socket 连接超时
+        sock_read=total,  # 读取超时
+    )
+
+# 线程内复用的 HTML 解析器, 避免每次解析重新构造
+_parser_tls = threading.local()
+
+
+def _get_parser(encoding: Optional[str] = None) -> HTMLParser:
+    """
+    获取当前线程的 HTML 解析器
+
+    容错解析, 丢弃注释与空白文本, 不收集 id 索引
+
+    Args:
+        encoding: HTTP 头声明的字符集, 为空时由 lxml 依据 <meta charset> 自动检测
+
+    Returns:
+        HTMLParser: 解析器实例
+    """
+    parsers = getattr(_parser_tls, "parsers", None)
+    if parsers is None:
+        parsers = _parser_tls.parsers = {}
+    parser = parsers.get(encoding)
+    if parser is None:
+        parser = parsers[encoding] = HTMLParser(
+            encoding=encoding,
+            recover=True,
+            remove_blank_text=True,
+            remove_comments=True,
+            collect_ids=False,
+            huge_tree=False,
+        )
+    return parser
+
+
+# HTML 解析线程池, 大页面解析不阻塞事件循环 (lxml 解析期间释放 GIL)
+_PARSER_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="html-parser")
+
+
+def _parse_bytes(body: Optional[bytes], encoding: Optional[str] = None):
+    """
+    用当前线程的解析器解析 HTML 原始字节
+
+    Args:
+        body: 响应原始字节
+        encoding: HTTP 头声明的字符集
+
+    Returns:
+        解析得到的根元素, 无内容或解析失败时为 None
+    """
+    if not body:
+        return None
+    try:
+        return fromstring(body, _get_parser(encoding))
+    except (etree.ParserError, etree.XMLSyntaxError, LookupError):
+        return None
+
+
+class _LazyTreeResponse(aiohttp.ClientResponse):
+    """ 按需解析 HTML 的响应对象, 只访问 status / json() 的调用方不付出解析开销 """
+
+    @property
+    def body(self) -> Optional[bytes]:
+        """ 已读取的原始响应体, 连接释放后仍可访问 (释放后 read() 会抛出异常) """
+        return self._body
+
+    @property
+    def tree(self):
+        """ 首次访问时直接解析已读取的原始字节并缓存, 无内容或解析失败时为 None """
+        tree = self.__dict__.get("_tree_cached", _MISSING)
+        if tree is _MISSING:
+            tree = self._tree_cached = _parse_bytes(self._body, self._html_encoding())
+        return tree
+
+    async def parse_tree(self):
+        """
+        在解析线程池中解析 HTML 并缓存, 供大页面在事件循环外解析
+
+        Returns:
+            与 tree 属性相同的解析结果
+        """
+        tree = self.__dict__.get("_tree_cached", _MISSING)
+        if tree is not _MISSING:
+            return tree
+        future = self.__dict__.get("_tree_future")
+        if future is None:
+            future = self._tree_future = asyncio.get_running_loop().run_in_executor(
+                _PARSER_POOL, _parse_bytes, self._body, self._html_encoding()
+            )
+        tree = self._tree_cached = await future
+        return tree
+
+    def _html_encoding(self) -> Optional[str]:
+        """ HTTP 头声明的字符集, 未声明时交给 lxml 检测 """
+        try:
+            return self.get_encoding() if self.charset else None
+        except (LookupError, RuntimeError):
+            return None
+
 
 class WebRequest:
     """
@@ -40,17 +230,24 @@ class WebRequest:
         self.connector = None
         self.closed = False
         self.default_headers = {
-            "User-Agent": (
+            hdrs.USER_AGENT: (
                 "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                 "AppleWebKit/537.36 (KHTML, like Gecko) "
                 "Chrome/91.0.4472.124 Safari/537.36"
             ),
-            "Accept": (
+            hdrs.ACCEPT: (
                 "text/html,application/xhtml+xml,application/xml;"
                 "q=0.9,image/webp,*/*;q=0.8"
             ),
-            "Accept-Language": "zh-CN,zh;q=0.8,en;q=0.6",
+            hdrs.ACCEPT_LANGUAGE: "zh-CN,zh;q=0.8,en;q=0.6",
         }
+        # 预先构造的只读默认请求头 (键为 istr, aiohttp 无需再做大小写规范化), 无自定义请求头时直接传给 aiohttp
+        self._default_headers_md = CIMultiDictProxy(CIMultiDict(self.default_headers))
+        # get() 默认 10 秒超时对应的配置
+        self._default_timeout = _mk_timeout(10.0)
+        # 直连请求的 ETag 缓存: url -> (etag, 响应), 代理源未更新 (304) 时直接复用上次响应
+        self._cache: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self._cache_maxsize = 256
 
     async def get_session(self) -> aiohttp.ClientSession:
         """
@@ -65,17 +262,14 @@ class WebRequest:
             self.connector = None
 
         if self.session is None or self.session.closed:
-            if self.connector is None or self.connector.closed:
-                self.connector = TCPConnector(
-                    ssl=False,  # 关闭 SSL/TLS 验证
-                    # force_close=True,  # 开启 TCP 连接
-                    limit=100,  # 并发连接池大小
-                    # limit_per_host=10,  # 并发连接数
-                    ttl_dns_cache=300,  # DNS 缓存时间
-                )
+            self.connector = _get_shared_connector()
             self.session = ClientSession(
                 connector=self.connector,
+                connector_owner=False,  # 共享连接器由 close_shared() 统一关闭
                 timeout=aiohttp.ClientTimeout(total=30),  # 默认超时
+                response_class=_LazyTreeResponse,
+                skip_auto_headers=(hdrs.USER_AGENT, hdrs.ACCEPT_ENCODING),  # 默认请求头已自带 User-Agent
+                trust_env=False,
             )
 
         if self.session is None:
@@ -95,12 +289,7 @@ class WebRequest:
             ClientTimeout: aiohttp 超时配置对象
         """
         if isinstance(timeout, (int, float)):
-            return ClientTimeout(
-                total=float(timeout),
-                connect=min(timeout * 0.2, 5),  # 连接超时
-                sock_connect=min(timeout * 0.2, 5),  # Socket 连接超时
-                sock_read=timeout,  # 读取超市
-            )
+            return _mk_timeout(float(timeout))
         return timeout
 
     async def _process_response(
@@ -122,32 +311,28 @@ class WebRequest:
             RequestError: 响应处理失败
         """
         if response.status >= 400:
-            self.logger.warning(
-                f"请求失败: {url}\n"
-                f"状态码: {response.status}"
-            )
+            self.logger.warning("请求失败: %s\n状态码: %s", url, response.status)
             return None
 
-        try:
-            text = await response.text(errors="ignore")
-            try:
-                tree = etree.HTML(text)
-                response.tree = tree
-            except etree.ParserError as e:
-                self.logger.error(
-                    f"HTML解析失败: {url}\n"
-                    f"状态码: {response.status}\n"
-                    f"Error: {str(e)}"
-                )
-                response.tree = None
-            return response
+        # 只读取原始字节, HTML 在首次访问 response.tree 时才解析, 无需先解码为 str
+        await response.read()
+        return response
 
-        except UnicodeDecodeError as e:
-            self.logger.error(
-                f"Unicode解码错误: {url}\n"
-                f"Error: {str(e)}"
-            )
-            return None
+    @staticmethod
+    def xpath(tree, expr: str) -> list:
+        """
+        使用缓存的预编译表达式执行 xpath 查询
+
+        Args:
+            tree: lxml 元素
+            expr: xpath 表达式
+
+        Returns:
+            list: 查询结果, tree 为 None 时为空列表
+        """
+        if tree is None:
+            return []
+        return _compile_xpath(expr)(tree)
 
     async def check_url(self, url: str, timeout: int = 5) -> bool:
         """ 检查 URL 是否可访问 """
@@ -160,7 +345,7 @@ class WebRequest:
             ) as response:
                 return response.status == 200
         except Exception as e:
-            self.logger.debug(f"URL检查失败 {url}: {e}")
+            self.logger.debug("URL检查失败 %s: %s", url, e)
             return False
 
     async def request(self, method: str, url: str, **kwargs) -> Optional[aiohttp.ClientResponse]:
@@ -169,7 +354,7 @@ class WebRequest:
         try:
             return await session.request(method, url, **kwargs)
         except Exception as e:
-            self.logger.error(f"请求失败 (web_request) : {str(e)}")
+            self.logger.error("请求失败 (web_request) : %s", e)
             return None
 
     async def get_with_retry(
@@ -209,16 +394,34 @@ class WebRequest:
                 if retry_on and not retry_on(e):
                     break
 
-                if attempt < retry_times:
-                    wait_time = retry_interval * (attempt + 1)
-                    self.logger.warning(
-                        f"请求失败,{wait_time}秒后重试 ({attempt + 1}/{retry_times})\n"
-                        f"URL: {url}\n"
-                        f"Error: {str(e)}"
-                    )
-                    await asyncio.sleep(wait_time)
+            # get() 失败时返回 None 而不抛异常, 同样需要退避后重试
+            if attempt < retry_times:
+                # 指数退避 + 随机抖动, 避免批量重试同时打到目标站点
+                wait_time = min(30.0, retry_interval * (2 ** attempt)) * random.uniform(0.5, 1.5)
+                self.logger.warning(
+                    "请求失败,%.2f秒后重试 (%d/%d)\nURL: %s\nError: %s",
+                    wait_time, attempt + 1, retry_times, url, last_error or "无响应",
+                )
+                await asyncio.sleep(wait_time)
+
+        raise RequestError(f"重试{retry_times}次后仍然失败: {last_error or '无响应'}")
 
-        raise RequestError(f"重试{retry_times}次后仍然失败: {str(last_error)}")
+    async def get_batch_with_retry(self, urls: List[str], **kwargs) -> List[Any]:
+        """
+        并发执行一批带重试的 get 请求, 单个地址的退避等待不拖慢其他地址
+
+        Args:
+            urls: 请求地址列表
+            **kwargs: 其他 get_with_retry() 参数
+
+        Returns:
+            List[Any]: 与 urls 一一对应的响应, 重试耗尽的项为 RequestError 实例
+        """
+        await self.get_session()  # 先建好会话, 避免并发请求各自创建
+        return list(await asyncio.gather(
+            *(self.get_with_retry(url, **kwargs) for url in urls),
+            return_exceptions=True,
+        ))
 
     async def get(
         self,
@@ -241,54 +444,169 @@ class WebRequest:
         Returns:
             Optional[Any]: 请求响应
         """
-        # 合并请求头
-        request_headers = self.default_headers.copy()
+        # 合并请求头, 无自定义请求头时复用默认请求头
         if headers:
-            request_headers.update(headers)
-
-        # 处理超市
-        if isinstance(timeout, (int, float)):
-            timeout = ClientTimeout(total=float(timeout))
+            request_headers = CIMultiDict(self._default_headers_md)
+            request_headers.update(headers)  # 同名请求头 (不区分大小写) 覆盖默认值
+        else:
+            request_headers = self._default_headers_md
+
+        # 经代理的请求用于验证代理, 必须真实往返, 只对直连请求做条件请求
+        cached = self._cache.get(url) if proxy is None else None
+        if cached is not None:
+            request_headers = CIMultiDict(request_headers)
+            request_headers[hdrs.IF_NONE_MATCH] = cached[0]
+
+        # 处理超时, 默认值直接复用预建配置
+        if timeout == 10.0:
+            timeout = self._default_timeout
+        else:
+            timeout = self._get_timeout(timeout)
 
         try:
             session = await self.get_session()
-            async with session.get(
+            response = await session.get(
                 url,
                 headers=request_headers,
                 timeout=timeout,
                 proxy=proxy,
                 allow_redirects=True,  # 允许重定向
                 **kwargs,
-            ) as response:
-                return await self._process_response(response, url)
+            )
+            try:
+                if cached is not None and response.status == 304:
+                    self._cache.move_to_end(url)
+                    return cached[1]
+                result = await self._process_response(response, url)
+            finally:
+                response.release()  # 读完响应体立即归还连接, 后续解析不占用连接
+
+            if proxy is None and result is not None:
+                self._store_cache(url, result)
+            return result
 
         except aiohttp.ClientError as e:
             self.logger.error(
-                f"aiohttp 客户端错误: {url}\n"
-                f"代理: {proxy or '无'}\n"
-                f"Error: {str(e)}"
+                "aiohttp 客户端错误: %s\n代理: %s\nError: %s", url, proxy or "无", e
             )
             return None
 
         except Exception as e:
-            self.logger.error(
-                f"未知错误: {url}\n" f"代理: {proxy or '无'}\n" f"Error: {str(e)}"
+            self.logger.error("未知错误: %s\n代理: %s\nError: %s", url, proxy or "无", e)
+            return None
+
+    async def probe(
+        self,
+        url: str,
+        proxy: Optional[str],
+        timeout: Union[float, ClientTimeout] = 5.0,
+    ) -> Tuple[bool, Optional[bytes]]:
+        """
+        代理验证快速路径: 只看状态码并读取少量响应体, 不解码不解析 HTML, 不走 ETag 缓存
+
+        Args:
+            url: 测试地址
+            proxy: 代理地址 ("protocol://host:port")
+            timeout: 超时时间
+
+        Returns:
+            Tuple[bool, Optional[bytes]]: (是否返回 200, 响应体前 512 字节)
+        """
+        try:
+            session = await self.get_session()
+            response = await session.get(
+                url,
+                headers=self._default_headers_md,
+                timeout=self._get_timeout(timeout),
+                proxy=proxy,
+                allow_redirects=False,
             )
+            try:
+                if response.status != 200:
+                    return False, None
+                return True, await response.content.read(512)
+            finally:
+                response.release()
+        except Exception as e:
+            self.logger.debug("代理探测失败: %s\n代理: %s\nError: %s", url, proxy or "无", e)
+            return False, None
+
+    def _store_cache(self, url: str, response: aiohttp.ClientResponse):
+        """
+        记录带 ETag 的直连响应, 超出容量时淘汰最久未使用的条目
+
+        Args:
+            url: 请求地址
+            response: 已读取响应体的响应对象
+        """
+        etag = response.headers.get(hdrs.ETAG)
+        if not etag:
+            self._cache.pop(url, None)
+            return
+        self._cache[url] = (etag, response)
+        self._cache.move_to_end(url)
+        if len(self._cache) > self._cache_maxsize:
+            self._cache.popitem(last=False)
+
+    async def get_json(self, url: str, **kwargs) -> Optional[Any]:
+        """
+        get 请求并解析 JSON 响应体
+
+        Args:
+            url: 请求地址
+            **kwargs: 其他 get() 参数
+
+        Returns:
+            Optional[Any]: 解析后的 JSON 数据, 请求或解析失败时为 None
+        """
+        response = await self.get(url, **kwargs)
+        if response is None:
+            return None
+        try:
+            return json_backend.loads(response.body)
+        except ValueError as e:
+            self.logger.error("JSON解析失败: %s\nError: %s", url, e)
             return None
 
+    async def probe_many(
+        self,
+        requests: List[Tuple[str, Optional[str]]],
+        timeout: Union[float, ClientTimeout] = 5.0,
+    ) -> List[Tuple[bool, Optional[bytes]]]:
+        """
+        并发探测一批 (地址, 代理), 共享同一会话与连接池
+
+        Args:
+            requests: (测试地址, 代理地址) 列表, 代理为 None 时直连
+            timeout: 超时时间
+
+        Returns:
+            List[Tuple[bool, Optional[bytes]]]: 与 requests 一一对应的 probe() 结果
+        """
+        await self.get_session()  # 先建好会话, 避免并发请求各自创建
+        return list(await asyncio.gather(
+            *(self.probe(url, proxy, timeout=timeout) for url, proxy in requests)
+        ))
+
     async def close(self):
-        """ 关闭 aiohttp 会话和 connector 连接器  """
+        """ 关闭 aiohttp 会话, 共享连接器保持打开供其他实例复用 """
         try:
             self.closed = True
             if self.session and not self.session.closed:
                 await self.session.close()
-            if self.connector and not self.connector.closed:
-                await self.connector.close()
             # self.session = None
             # self.connector = None
         except Exception as e:
             self.logger.error(f"aiohttp 关闭会话和 connector 连接器时发生错误: {str(e)}")
 
+    @classmethod
+    async def close_shared(cls):
+        """ 关闭共享连接器, 进程退出前调用 """
+        global _SHARED_CONNECTOR
+        connector, _SHARED_CONNECTOR = _SHARED_CONNECTOR, None
+        if connector is not None and not connector.closed:
+            await connector.close()
+
     async def __aenter__(self):
         """
         异步上下文管理器入口
@@ -326,34 +644,31 @@ if __name__ == "__main__":
     import json
     import aiohttp
 
+    # 异常类型 -> 提示信息, 按 MRO 查找以保留子类匹配 (ClientProxyConnectionError 优先于其父类)
+    ERR_MAP = {
+        aiohttp.ClientProxyConnectionError: "代理连接错误：代理服务器拒绝连接",
+        aiohttp.ClientConnectorError: "连接错误：代理服务器无法连接",
+        asyncio.TimeoutError: "连接超时：代理服务器响应超时",
+    }
 
-    async def test_proxy(client, proxy, timeout=5):
-        """测试代理是否可用"""
-        try:
-            response = await client.get(
-                    'http://httpbin.org/ip',
-                    proxy=proxy,
-                    timeout=timeout,
-            )
 
-            if response:
-                if response.status == 200:
-                    try:
-                        json_data = await response.json()
-                        return True, json_data
-                    except:
-                        return False, "响应格式错误"
-                return False, f"状态码错误: {response.status}"
-            return False, "无响应"
-
-        except aiohttp.ClientProxyConnectionError:
-            return False, "代理连接错误：代理服务器拒绝连接"
-        except aiohttp.ClientConnectorError:
-            return False, "连接错误：代理服务器无法连接"
-        except asyncio.TimeoutError:
-            return False, "连接超时：代理服务器响应超时"
-        except Exception as e:
-            return False, f"其他错误：{str(e)}"
+    def describe_error(e: Exception) -> str:
+        """将异常映射为提示信息"""
+        for exc_type in type(e).__mro__:
+            msg = ERR_MAP.get(exc_type)
+            if msg:
+                return msg
+        return f"其他错误：{str(e)}"
+
+
+    def test_proxy(ok, body):
+        """根据探测结果判断代理是否可用"""
+        if not ok:
+            return False, "无响应或状态码错误"
+        try:
+            return True, json_backend.loads(body)
+        except ValueError:
+            return False, "响应格式错误"
 
 
     async def main():
@@ -375,9 +690,13 @@ if __name__ == "__main__":
 
             print("=== 代理可用性测试 ===")
             valid_proxies = []
-            for proxy in proxies:
+            probes = await client.probe_many(
+                [("http://httpbin.org/ip", proxy) for proxy in proxies],
+                timeout=5,
+            )
+            for proxy, (ok, body) in zip(proxies, probes):
                 print(f"\n测试代理: {proxy}")
-                is_valid, result = await test_proxy(client, proxy)
+                is_valid, result = test_proxy(ok, body)
                 if is_valid:
                     print("✓ 代理可用")
                     print(f"代理IP信息: {result}")
@@ -409,22 +728,21 @@ if __name__ == "__main__":
                                 print("JSON响应:")
                                 print(json.dumps(data, indent=2))
                             elif 'html' in content_type:
-                                title = response.tree.xpath('//title/text()')
+                                title = _XP_TITLE(response.tree)
                                 print(f"HTML标题: {title}")
                             print("✓ 请求成功")
                         else:
                             print("✗ 请求失败：无响应")
 
-                    except aiohttp.ClientProxyConnectionError:
-                        print("✗ 代理错误：代理服务器拒绝连接")
-                    except aiohttp.ClientConnectorError:
-                        print("✗ 连接错误：无法连接到代理服务器")
-                    except asyncio.TimeoutError:
-                        print("✗ 超时错误：代理服务器响应超时")
                     except Exception as e:
-                        print(f"✗ 其他错误：{str(e)}")
+                        print(f"✗ {describe_error(e)}")
 
                     print("-" * 50)
 
 
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())